@@ -0,0 +1,336 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import numpy as np
+
+from near_duplicates import signature, band_keys, similarity, NEAR_DUP_THRESHOLD
+
+# Every scraped article, kept across refreshes
+ARTICLE_STORE_DB = os.environ.get(
+    "ARTICLE_STORE_DB",
+    os.path.join(os.path.dirname(__file__), "cache", "articles.sqlite3")
+)
+# Bumped when the tables change; the store is a cache and is rebuilt by the next scrapes
+SCHEMA_VERSION = 4
+# Stories no feed has listed for this long are dropped
+ARTICLE_RETENTION_HOURS = int(os.environ.get("ARTICLE_RETENTION_HOURS", 72))
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"ref", "cmpid", "ns_source", "ns_mchannel", "ns_campaign", "at_medium", "at_campaign", "CMP"}
+
+# Flags derived at read time, never stored
+DERIVED_FIELDS = ("is_breaking", "is_trending", "is_top", "trending_score", "cluster_id", "ai_score", "ai_status")
+# Full article text, stored in its own column for the text model (the feed only shows the short summary)
+DESCRIPTION_FIELD = "description"
+
+
+def normalize_link(link):
+    """Same article, same key: scheme, www., fragment, trailing slash and tracking params are ignored."""
+    if not link:
+        return ""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k not in TRACKING_PARAMS
+    )
+    key = host + parts.path.rstrip("/")
+    return key + "?" + urlencode(query) if query else key
+
+
+def title_hash(title):
+    """Hash of the normalized title (exact repeats skip the near-duplicate search)."""
+    return hashlib.sha1(title.lower().strip().encode("utf-8")).hexdigest()
+
+
+def is_breaking_news(timestamp):
+    """Breaking = published within the last 2 hours."""
+    return (time.time() - timestamp) < 7200 if timestamp > 0 else False
+
+
+class ArticleStore:
+    """
+    SQLite store of scraped articles, so coverage accumulates across refreshes
+    instead of being resampled, and /api/feed sections are index lookups.
+
+    One row per normalized link. Articles are grouped into story clusters:
+    an exact title repeat, or a MinHash/LSH near-duplicate of a cluster's
+    canonical row (its first article), joins that cluster. Only canonical
+    rows are listed; trending_score is the cluster size. Each new article
+    costs one signature plus an indexed bucket lookup, never a pairwise pass.
+    """
+
+    def __init__(self, path=ARTICLE_STORE_DB, retention_hours=ARTICLE_RETENTION_HOURS):
+        self.retention_seconds = retention_hours * 3600
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS articles")
+            self.db.execute("DROP TABLE IF EXISTS lsh_buckets")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                link_key TEXT PRIMARY KEY,
+                title_hash TEXT NOT NULL,
+                cluster_id TEXT NOT NULL,
+                canonical INTEGER NOT NULL,
+                trending_score INTEGER NOT NULL DEFAULT 1,
+                category TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                signature BLOB NOT NULL,
+                payload TEXT NOT NULL,
+                description TEXT NOT NULL DEFAULT '',
+                ai_score REAL,
+                ai_status TEXT,
+                verified_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                retry_after REAL
+            )
+        """)
+        # LSH band buckets: band key -> clusters with an article hashing there
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band_key BLOB NOT NULL,
+                cluster_id TEXT NOT NULL,
+                PRIMARY KEY (band_key, cluster_id)
+            ) WITHOUT ROWID
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title_hash)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles(cluster_id, canonical)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_articles_recent ON articles(canonical, timestamp)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_articles_category ON articles(canonical, category, timestamp)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_buckets_cluster ON lsh_buckets(cluster_id)")
+        # Verification queue: listed stories the text model hasn't scored yet, newest first
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_articles_unverified ON articles(timestamp) "
+            "WHERE canonical = 1 AND verified_at IS NULL"
+        )
+        self.db.commit()
+
+    def _find_cluster(self, th, sig, keys):
+        """Cluster this article belongs to, or None if it's a new story."""
+        row = self.db.execute("SELECT cluster_id FROM articles WHERE title_hash = ? LIMIT 1", (th,)).fetchone()
+        if row:
+            return row[0]
+        placeholders = ','.join('?' * len(keys))
+        cluster_ids = [r[0] for r in self.db.execute(
+            f"SELECT DISTINCT cluster_id FROM lsh_buckets WHERE band_key IN ({placeholders})", keys
+        )]
+        if not cluster_ids:
+            return None
+        candidates = self.db.execute(
+            f"SELECT cluster_id, signature FROM articles "
+            f"WHERE cluster_id IN ({','.join('?' * len(cluster_ids))}) AND canonical = 1",
+            cluster_ids
+        ).fetchall()
+        best, best_similarity = None, NEAR_DUP_THRESHOLD
+        for cluster_id, blob in candidates:
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= best_similarity:
+                best, best_similarity = cluster_id, score
+        return best
+
+    def upsert_many(self, items):
+        """
+        Inserts new articles and refreshes ones we already have, setting
+        item['cluster_id'] on each. Returns the number of new rows.
+        """
+        now = time.time()
+        added = 0
+        with self.db:
+            for item in items:
+                th = title_hash(item['title'])
+                link_key = normalize_link(item.get('link', '')) or f"title:{th}"
+                payload = json.dumps({
+                    k: v for k, v in item.items() if k not in DERIVED_FIELDS and k != DESCRIPTION_FIELD
+                })
+                description = item.get(DESCRIPTION_FIELD, item.get('summary', ''))
+
+                row = self.db.execute("SELECT cluster_id FROM articles WHERE link_key = ?", (link_key,)).fetchone()
+                if row:
+                    self.db.execute(
+                        "UPDATE articles SET payload = ?, description = ?, category = ?, timestamp = ?, last_seen = ? "
+                        "WHERE link_key = ?",
+                        (payload, description, item['category'], item['timestamp'], now, link_key)
+                    )
+                    item['cluster_id'] = row[0]
+                    continue
+
+                sig = signature(item['title'], item.get('summary', ''))
+                keys = band_keys(sig)
+                cluster_id = self._find_cluster(th, sig, keys)
+                canonical = cluster_id is None
+                if canonical:
+                    cluster_id = link_key
+                self.db.execute(
+                    "INSERT INTO articles (link_key, title_hash, cluster_id, canonical, trending_score, category, "
+                    "timestamp, first_seen, last_seen, signature, payload, description) "
+                    "VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)",
+                    (link_key, th, cluster_id, int(canonical), item['category'], item['timestamp'],
+                     now, now, sig.tobytes(), payload, description)
+                )
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (band_key, cluster_id) VALUES (?, ?)",
+                    [(key, cluster_id) for key in keys]
+                )
+                if not canonical:
+                    # Same story from another link or outlet: it trends
+                    self.db.execute(
+                        "UPDATE articles SET trending_score = trending_score + 1 WHERE cluster_id = ? AND canonical = 1",
+                        (cluster_id,)
+                    )
+                item['cluster_id'] = cluster_id
+                added += 1
+        return added
+
+    def prune(self):
+        """Drops stories (all their links) that no feed has listed within the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        with self.db:
+            removed = self.db.execute("""
+                DELETE FROM articles WHERE cluster_id IN (
+                    SELECT cluster_id FROM articles GROUP BY cluster_id HAVING MAX(last_seen) < ?
+                )
+            """, (cutoff,)).rowcount
+            if removed:
+                self.db.execute(
+                    "DELETE FROM lsh_buckets WHERE cluster_id NOT IN (SELECT cluster_id FROM articles)"
+                )
+        return removed
+
+    def pending_verification(self, limit=64):
+        """
+        Newest listed stories without a text-model score, skipping ones whose
+        last failed attempt is still backing off: [(link_key, {url, title, description})].
+        """
+        rows = self.db.execute(
+            "SELECT link_key, payload, description FROM articles WHERE canonical = 1 AND verified_at IS NULL "
+            "AND (retry_after IS NULL OR retry_after <= ?) ORDER BY timestamp DESC LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+        pending = []
+        for link_key, payload, description in rows:
+            item = json.loads(payload)
+            pending.append((link_key, {
+                "url": item.get('link', ''),
+                "title": item['title'],
+                "description": description
+            }))
+        return pending
+
+    def count_pending_verification(self):
+        return self.db.execute(
+            "SELECT COUNT(*) FROM articles WHERE canonical = 1 AND verified_at IS NULL"
+        ).fetchone()[0]
+
+    def save_verifications(self, results):
+        """Stores [(link_key, ai_score, ai_status)] for scored articles."""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "UPDATE articles SET ai_score = ?, ai_status = ?, verified_at = ?, last_error = NULL WHERE link_key = ?",
+                [(score, status, now, link_key) for link_key, score, status in results]
+            )
+
+    def save_verification_failures(self, failures, max_attempts, retry_seconds):
+        """
+        Records [(link_key, error)] for articles the text model failed on. The
+        article is retried after retry_seconds, doubling per attempt; after
+        max_attempts it is marked verified with no score and left alone.
+        """
+        now = time.time()
+        with self.db:
+            # Right-hand sides see the row's values from before the update
+            self.db.executemany(
+                "UPDATE articles SET attempts = attempts + 1, last_error = ?, "
+                "retry_after = ? + ? * (1 << attempts), "
+                "verified_at = CASE WHEN attempts + 1 >= ? THEN ? ELSE NULL END WHERE link_key = ?",
+                [(error, now, retry_seconds, max_attempts, now, link_key) for link_key, error in failures]
+            )
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM articles WHERE canonical = 1").fetchone()[0]
+
+    def _query(self, where="", params=(), limit=20):
+        rows = self.db.execute(
+            f"SELECT payload, trending_score, cluster_id, ai_score, ai_status FROM articles WHERE canonical = 1 {where} "
+            f"ORDER BY timestamp DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+        items = []
+        for payload, trending_score, cluster_id, ai_score, ai_status in rows:
+            item = json.loads(payload)
+            item['cluster_id'] = cluster_id
+            # Text-model verdict, once the verification queue has scored it
+            if ai_status is not None:
+                item['ai_score'] = ai_score
+                item['ai_status'] = ai_status
+            item['trending_score'] = trending_score
+            item['is_trending'] = trending_score > 1
+            item['is_breaking'] = is_breaking_news(item['timestamp'])
+            items.append(item)
+        return items
+
+    def latest(self, limit=20):
+        items = self._query(limit=limit)
+        for item in items:
+            item['is_top'] = True
+        return items
+
+    def breaking(self, limit=20):
+        return self._query("AND timestamp >= ?", (int(time.time()) - 7200,), limit)
+
+    def trending(self, limit=20):
+        return self._query("AND trending_score > 1", (), limit)
+
+    def by_category(self, category, limit=20):
+        return self._query("AND category = ?", (category,), limit)
+
+    def close(self):
+        self.db.close()
+
+
+class ArticleStoreWriter:
+    """
+    Runs ArticleStore calls on one dedicated thread with its own connection,
+    for the heavy ones (MinHash clustering on insert, pruning) that would
+    otherwise stall the event loop. WAL mode lets the loop's own connection
+    keep serving /api/feed reads while a write is in progress.
+    """
+
+    def __init__(self, path=ARTICLE_STORE_DB, retention_hours=ARTICLE_RETENTION_HOURS):
+        self.path = path
+        self.retention_hours = retention_hours
+        self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="article-store")
+        # Opened on the writer thread (sqlite3 connections stay on their own thread)
+        self.store = None
+
+    def _call(self, method, args):
+        if self.store is None:
+            self.store = ArticleStore(self.path, self.retention_hours)
+        return getattr(self.store, method)(*args)
+
+    async def call(self, method, *args):
+        """Runs store.method(*args) on the writer thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread, self._call, method, args)
+
+    def close(self):
+        def close_store():
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+        # Queued after any pending writes, so they finish first
+        self.thread.submit(close_store)
+        self.thread.shutdown(wait=True)
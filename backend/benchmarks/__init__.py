@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the backend hot paths.
+
+Run from the backend directory:
+    python -m benchmarks --output bench.json
+    python -m benchmarks --suite image --baseline bench.json
+"""
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+SUITES = ("image", "text", "scraper")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the stages whose median got slower than baseline by more than
+    `tolerance` (0.25 = 25%), plus every stage that errored in this run.
+    """
+    regressions = []
+    # A stage that no longer runs can't be compared, so it always counts
+    for name, new in results.items():
+        if isinstance(new, dict) and "error" in new:
+            old = baseline.get("results", {}).get(name)
+            regressions.append({
+                "stage": name,
+                "baseline_ms": old.get("median_ms") if isinstance(old, dict) else None,
+                "current_ms": None,
+                "error": new["error"]
+            })
+    for name, old in baseline.get("results", {}).items():
+        new = results.get(name)
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            continue
+        if "median_ms" not in old or "median_ms" not in new or old["median_ms"] <= 0:
+            continue
+        ratio = new["median_ms"] / old["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "stage": name,
+                "baseline_ms": old["median_ms"],
+                "current_ms": new["median_ms"],
+                "ratio": round(ratio, 3)
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmarks the forensic, text and scraper hot paths (run from backend/)'
+    )
+    parser.add_argument('--suite', action='append', choices=SUITES, help='Suite to run (repeatable, default: all)')
+    parser.add_argument('--repeat', type=int, default=None, help='Timed runs per stage (default: per suite)')
+    parser.add_argument('--images', type=str, default=None, help='Directory of images to use instead of the synthetic corpus')
+    parser.add_argument('--head-latency-ms', type=float, default=20, help='Simulated CDN round trip for image HEAD checks')
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this file')
+    parser.add_argument('--baseline', type=str, default=None, help='Previous JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed median slowdown vs baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    suites = args.suite or list(SUITES)
+    results = {}
+
+    # stdout carries only the JSON report: progress lines, DEBUG prints from
+    # the code under test and output from worker processes all go to stderr
+    sys.stdout.flush()
+    report_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    started = time.time()
+
+    if "image" in suites:
+        from benchmarks import image_stages
+        results.update(image_stages.run(repeat=args.repeat or 20, image_dir=args.images))
+    if "text" in suites:
+        from benchmarks import text_stages
+        results.update(text_stages.run(repeat=args.repeat or 50))
+    if "scraper" in suites:
+        from benchmarks import scraper_stages
+        results.update(scraper_stages.run(repeat=args.repeat or 10, head_latency=args.head_latency_ms / 1000))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "suites": suites,
+            "duration_s": round(time.time() - started, 2)
+        },
+        "results": results
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        report["regressions"] = regressions
+        for r in regressions:
+            if "error" in r:
+                print(f"REGRESSION: {r['stage']} failed: {r['error'].splitlines()[0]}", file=sys.stderr)
+            else:
+                print(f"REGRESSION: {r['stage']} {r['baseline_ms']:.3f} -> {r['current_ms']:.3f} ms (x{r['ratio']})",
+                      file=sys.stderr)
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, report_out, indent=2)
+        report_out.write("\n")
+    report_out.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
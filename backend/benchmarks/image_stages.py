@@ -0,0 +1,89 @@
+import os
+import sys
+import cv2
+import numpy as np
+
+from benchmarks.timing import run_stage
+
+
+def synthetic_corpus():
+    """
+    Fixed, seeded image corpus: name -> encoded bytes.
+    Covers a small and a very large photo (reduced decode path), a portrait
+    and a flat-color graphic (synthetic-graphic branch).
+    """
+    rng = np.random.default_rng(1234)
+    corpus = {}
+
+    def photo(width, height):
+        # Smooth low-frequency scene upsampled, plus sensor-like noise
+        base = rng.integers(0, 255, (max(height // 40, 2), max(width // 40, 2), 3), dtype=np.uint8)
+        image = cv2.resize(base, (width, height), interpolation=cv2.INTER_CUBIC).astype(np.float32)
+        image += rng.normal(0, 6, image.shape)
+        return np.clip(image, 0, 255).astype(np.uint8)
+
+    corpus["photo_640x480.jpg"] = cv2.imencode('.jpg', photo(640, 480), [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    corpus["portrait_1080x1350.jpg"] = cv2.imencode('.jpg', photo(1080, 1350), [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+    corpus["photo_4000x3000.jpg"] = cv2.imencode('.jpg', photo(4000, 3000), [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+    graphic = np.full((800, 1200, 3), (40, 40, 200), dtype=np.uint8)
+    cv2.rectangle(graphic, (100, 100), (700, 500), (255, 255, 255), -1)
+    cv2.circle(graphic, (900, 400), 200, (0, 200, 255), -1)
+    cv2.putText(graphic, "BREAKING", (150, 350), cv2.FONT_HERSHEY_SIMPLEX, 4, (0, 0, 0), 12)
+    corpus["graphic_1200x800.png"] = cv2.imencode('.png', graphic)[1].tobytes()
+    return corpus
+
+
+def load_corpus(image_dir):
+    corpus = {}
+    for name in sorted(os.listdir(image_dir)):
+        if name.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp')):
+            with open(os.path.join(image_dir, name), 'rb') as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def run(repeat=20, image_dir=None):
+    """Times every stage of ForensicAnalyzer.analyze_bytes on each corpus image."""
+    from engine.forensics import ForensicAnalyzer
+
+    analyzer = ForensicAnalyzer()
+    pre, ext, det = analyzer.preprocessor, analyzer.extractors, analyzer.detectors
+    corpus = load_corpus(image_dir) if image_dir else synthetic_corpus()
+    results = {}
+
+    for name, image_bytes in corpus.items():
+        print(f"image/{name} ({len(image_bytes)} bytes)", file=sys.stderr)
+        prefix = f"image.{name}."
+
+        # Intermediate products for the later stages (computed once, outside the timers)
+        img = pre.decode_bytes(image_bytes)
+        std = pre.resize_with_padding(img)
+        noise = pre.extract_noise_map(std)
+        gray = pre.get_color_spaces(std)['gray']
+        features = analyzer.extract_features(image_bytes)
+
+        stages = [
+            ("decode", lambda: pre.decode_bytes(image_bytes)),
+            ("decode_full", lambda: cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)),
+            ("resize", lambda: pre.resize_with_padding(img)),
+            ("noise_map", lambda: pre.extract_noise_map(std)),
+            ("color_spaces", lambda: pre.get_color_spaces(std)),
+            ("ela", lambda: ext.run_ela(std)),
+            ("fft", lambda: ext.run_fft(gray)),
+            ("laplacian", lambda: ext.get_texture_features(gray)),
+            ("copy_move", lambda: det.detect_copy_move(std)),
+            ("noise_grid", lambda: det.detect_noise_inconsistency(noise)),
+            ("color_count", lambda: ext.count_unique_colors(std)),
+            ("edge_density", lambda: ext.get_edge_density(gray)),
+            ("predict", lambda: analyzer.score_features([features])),
+            ("total", lambda: analyzer.analyze_bytes(image_bytes)),
+        ]
+        for stage, fn in stages:
+            run_stage(results, prefix + stage, fn, repeat)
+
+    # Batched scoring (one predict_proba call for a feed page worth of images)
+    features = [analyzer.extract_features(b) for b in corpus.values()]
+    page = (features * 20)[:20]
+    run_stage(results, "image.predict_batch_20", lambda: analyzer.score_features(page), repeat)
+    return results
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks.timing import measure_async, format_result
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when a feed's HEAD checks all connect at once
+    request_queue_size = 128
+
+
+class FixtureServer:
+    """
+    Local stand-in for the feed and image hosts.
+    GET /feeds/<name> serves a recorded fixture with {base} pointing back here;
+    HEAD on any image path answers 200 after `head_latency` seconds, like a CDN round trip.
+    """
+
+    def __init__(self, head_latency=0.02):
+        self.feeds = {}
+        for name in sorted(os.listdir(FIXTURES_DIR)):
+            if name.endswith('.xml'):
+                with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+                    self.feeds[name] = f.read()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.rsplit('/', 1)[-1]
+                if not self.path.startswith('/feeds/') or name not in server.feeds:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = server.feeds[name].replace('{base}', server.base).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                time.sleep(head_latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _Server(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def feed_url(self, name):
+        return f"{self.base}/feeds/{name}"
+
+    def body(self, name):
+        return self.feeds[name].replace('{base}', self.base)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+async def _run(repeat, head_latency):
+    import scraper
+    from feed_state import FeedStateStore
+    from article_store import ArticleStoreWriter
+
+    server = FixtureServer(head_latency=head_latency)
+    # Keep benchmark scrapes out of the real feed state and article store
+    state_dir = tempfile.mkdtemp(prefix='feed_state_bench_')
+    scraper._feed_state = FeedStateStore(os.path.join(state_dir, 'feed_state.sqlite3'))
+    scraper._store_writer = ArticleStoreWriter(os.path.join(state_dir, 'articles.sqlite3'))
+    results = {}
+
+    async def record(name, fn, runs=repeat):
+        try:
+            results[name] = await measure_async(fn, repeat=runs)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"  {name}: {format_result(results[name])}", file=sys.stderr)
+
+    try:
+        async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
+            for name in server.feeds:
+                print(f"scraper/{name}", file=sys.stderr)
+                url, body = server.feed_url(name), server.body(name)
+                prefix = f"scraper.{name}."
+
+                async def cold_verify():
+                    scraper._verified_upscales.clear()
+                    await scraper.parse_feed(url, body, client)
+
+                await record(prefix + "fetch", lambda: scraper.fetch_feed(client, url))
+                await record(prefix + "parse_only", lambda: scraper.parse_feed(url, body))
+                await record(prefix + "parse_verify_cold", cold_verify)
+                await record(prefix + "parse_verify_warm", lambda: scraper.parse_feed(url, body, client))
+                items = await scraper.parse_feed(url, body)
+                results[prefix + "items"] = len(items)
+
+        urls = [server.feed_url(name) for name in server.feeds]
+
+        async def scrape_cold():
+            scraper._verified_upscales.clear()
+            await scraper.scrape_subset(urls)
+
+        print("scraper/scrape_subset", file=sys.stderr)
+        await record("scraper.scrape_subset_cold", scrape_cold, max(repeat // 2, 3))
+    finally:
+        scraper._feed_state.close()
+        scraper._feed_state = None
+        scraper.shutdown_store_writer()
+        scraper.shutdown_parse_pool()
+        server.close()
+    return results
+
+
+def run(repeat=10, head_latency=0.02):
+    """Times fetch_feed / parse_feed / scrape_subset against recorded fixtures on a local server."""
+    return asyncio.run(_run(repeat, head_latency))
@@ -0,0 +1,62 @@
+import sys
+
+from benchmarks.timing import run_stage
+
+# Fixed article set: trusted source, lookalike domain, clickbait, empty description
+ARTICLES = [
+    {
+        "url": "https://www.reuters.com/world/europe/officials-confirm-budget-figures-2024-05-14/",
+        "title": "Officials confirm revised budget figures after parliamentary review",
+        "description": "The finance ministry published the revised figures on Tuesday, according to a statement, "
+                       "citing lower energy costs and higher tax receipts in the first quarter."
+    },
+    {
+        "url": "http://reuters-news.co/breaking/shocking-truth-revealed",
+        "title": "SHOCKING: You Won't Believe What Scientists Just Discovered!!!",
+        "description": "Doctors hate this one weird trick. Click here to find out the secret they don't want you to know!"
+    },
+    {
+        "url": "https://bbc-co.uk.news-today.info/article?id=88123",
+        "title": "Miracle cure found, experts stunned by incredible results",
+        "description": "Unbelievable breakthrough that will change everything forever."
+    },
+    {
+        "url": "https://www.theguardian.com/science/2024/may/14/telescope-images-distant-galaxy",
+        "title": "Telescope captures detailed images of distant galaxy cluster",
+        "description": ""
+    },
+]
+
+
+def run(repeat=50):
+    """Times each TextForensics sub-analyzer and the full get_truth_score per article."""
+    from engine.text_analyzer import TextForensics
+
+    analyzer = TextForensics()
+    results = {}
+
+    for i, article in enumerate(ARTICLES):
+        url, title, description = article["url"], article["title"], article["description"]
+        print(f"text/article_{i} ({url})", file=sys.stderr)
+        prefix = f"text.article_{i}."
+
+        # Raw strings on purpose: each analyzer pays for its own parse, as it would standalone
+        stages = [
+            ("decompose_url", lambda: analyzer.decompose_url(url)),
+            ("analyze_url", lambda: analyzer.analyze_url(url)),
+            ("title_linguistics", lambda: analyzer.analyze_title_linguistics(title)),
+            ("title_clickbait", lambda: analyzer.analyze_title_clickbait(title)),
+            ("title_sentiment", lambda: analyzer.analyze_title_sentiment(title)),
+            ("title_tone", lambda: analyzer.analyze_title_tone(title)),
+            ("description_alignment", lambda: analyzer.analyze_description_alignment(title, description)),
+            ("description_density", lambda: analyzer.analyze_description_density(description)),
+            ("description_sentiment", lambda: analyzer.analyze_description_sentiment(description)),
+            ("description_quality", lambda: analyzer.analyze_description_quality(description)),
+            ("ai_model", lambda: analyzer.analyze_with_ai(title, description)),
+            ("total", lambda: analyzer.get_truth_score(url, title, description)),
+        ]
+        for stage, fn in stages:
+            run_stage(results, prefix + stage, fn, repeat)
+
+    run_stage(results, f"text.batch_of_{len(ARTICLES) * 10}", lambda: analyzer.get_truth_scores(ARTICLES * 10), max(repeat // 5, 3))
+    return results
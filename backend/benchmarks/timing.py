@@ -0,0 +1,54 @@
+import statistics
+import sys
+import time
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Runs fn warmup + repeat times and returns timing stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+async def measure_async(fn, repeat=20, warmup=2):
+    """Async variant of measure: fn is a zero-argument coroutine function."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max_ms": round(ordered[-1], 4)
+    }
+
+
+def run_stage(results, name, fn, repeat, warmup=2):
+    """Times one stage into results[name]; a failing stage is recorded instead of aborting the suite."""
+    try:
+        results[name] = measure(fn, repeat=repeat, warmup=warmup)
+    except Exception as e:
+        results[name] = {"error": f"{type(e).__name__}: {e}"}
+    print(f"  {name}: {format_result(results[name])}", file=sys.stderr)
+
+
+def format_result(result):
+    if "error" in result:
+        return f"ERROR {result['error'].splitlines()[0]}"
+    return f"median {result['median_ms']:.3f} ms (p95 {result['p95_ms']:.3f}, n={result['runs']})"
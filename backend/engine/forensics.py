@@ -2,10 +2,13 @@ import os
 import sys
 import cv2
 import pickle
+import hashlib
 import numpy as np
 from PIL import Image
 import io
 
+from engine.stage_timer import instrument, stage
+
 # Resolve paths relative to project root
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
@@ -15,8 +18,9 @@ if src_dir not in sys.path:
 
 try:
     from preprocessing import ImagePreprocessor
-    from extractors import ForensicExtractors
+    from extractors import ForensicExtractors, MODEL_FEATURES, FEATURE_PIPELINE_VERSION
     from forgery_detectors import ForgeryDetectors
+    from compiled_forest import CompiledForest, check_parity, sample_inputs
 except ImportError as e:
     print(f"Error importing forensic modules: {e}")
     print(f"Tried loading from: {src_dir}")
@@ -27,24 +31,56 @@ class ForensicAnalyzer:
             model_path = os.path.join(project_root, 'model', 'image_model', 'forensic_model.pkl')
             
         self.model_path = model_path
-        self.preprocessor = ImagePreprocessor()
-        self.extractors = ForensicExtractors()
-        self.detectors = ForgeryDetectors()
+        # Stage timers are free unless a caller is collecting timings (/metrics)
+        self.preprocessor = instrument(ImagePreprocessor(), {
+            "decode_bytes": "decode",
+            "resize_with_padding": "resize",
+            "extract_noise_map": "noise_map",
+            "get_color_spaces": "color_spaces",
+        })
+        self.extractors = instrument(ForensicExtractors(), {
+            "run_ela": "ela",
+            "run_fft": "fft",
+            "get_texture_features": "laplacian",
+            "count_unique_colors": "color_count",
+            "get_edge_density": "edge_density",
+        })
+        self.detectors = instrument(ForgeryDetectors(), {
+            "detect_copy_move": "copy_move",
+            "detect_noise_inconsistency": "noise_grid",
+        })
         
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Forensic model not found at {model_path}")
             
         with open(model_path, 'rb') as f:
-            self.model = pickle.load(f)
+            model_bytes = f.read()
+        self.model = pickle.loads(model_bytes)
+        # Identifies the model in result cache keys
+        self.model_version = hashlib.sha256(model_bytes).hexdigest()[:16]
+        # Identifies the feature pipeline in result cache keys: its code version
+        # plus the settings that change features (decode mode, copy-move engine)
+        decode = "reduced" if self.preprocessor.reduced_decode else "full"
+        self.pipeline_version = f"{FEATURE_PIPELINE_VERSION}-{decode}-{self.detectors.copy_move}"
 
-    def analyze_bytes(self, image_bytes):
-        """Processes image bytes and returns forensic report."""
-        # 1. Load image from bytes
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            raise ValueError("Invalid image data")
+        # Flat-array copy of the forest for scoring; kept only if it matches sklearn exactly
+        self.scorer = self.model
+        try:
+            forest = CompiledForest.from_sklearn(self.model)
+            ok, max_diff = check_parity(self.model, forest, sample_inputs(self.model))
+            if ok:
+                self.scorer = forest
+            else:
+                print(f"WARNING: Compiled forest disagrees with sklearn (max diff {max_diff}); using sklearn")
+        except Exception as e:
+            print(f"WARNING: Could not compile forest ({e}); using sklearn")
+
+    def extract_features(self, image_bytes):
+        """Steps 1-3: decodes image bytes and returns the combined feature dict."""
+        # 1. Load image from bytes (reduced-resolution decode for large images when
+        #    REDUCED_DECODE is on; decompression bombs rejected from the header
+        #    before allocating)
+        img = self.preprocessor.decode_bytes(image_bytes)
 
         # 2. Preprocess (Since preprocessor.process expects a path, we'll bypass or modify)
         # Looking at preprocessing.py, it calls cv2.imread(image_path)
@@ -71,32 +107,37 @@ class ForensicAnalyzer:
             processed_data['noise_map']
         )
         
-        combined_features = {**forensic_features, **forgery_features}
-        
+        return {**forensic_features, **forgery_features}
+
+    def score_features(self, features_list):
+        """
+        Steps 4-5 for any number of images: every feature vector is scored in
+        a single predict_proba call. Returns one report per feature dict.
+        """
         # Feature order must match training
-        feature_order = [
-            'ela_mean', 'ela_std', 'fft_mean', 'texture_variance', 
-            'noise_mean', 'copy_move_score', 'noise_inconsistency'
+        X = np.array([[features.get(f, 0.0) for f in MODEL_FEATURES] for features in features_list])
+
+        # 5. Predict
+        with stage("predict"):
+            probabilities = self.scorer.predict_proba(X) # [Prob_Real, Prob_Fake] per row
+        # Same as model.predict: the class with the highest probability
+        predictions = self.scorer.classes_[np.argmax(probabilities, axis=1)]
+
+        return [
+            self.build_report(features, probability, int(prediction))
+            for features, probability, prediction in zip(features_list, probabilities, predictions)
         ]
-        
-        X = [combined_features.get(f, 0.0) for f in feature_order]
-        X = np.array(X).reshape(1, -1)
 
+    def build_report(self, combined_features, probability, prediction):
+        """Turns one image's features and model output into the forensic report."""
         # 4. Digital Graphic Detection (Poster/Synthetic Check)
         # Real photos have millions of colors. Posters have few flat colors.
-        unique_colors = len(np.unique(raw_processed.reshape(-1, 3), axis=0))
-        # Edge density check
-        gray = processed_data['gray']
-        edges = cv2.Canny(gray, 100, 200)
-        edge_density = np.sum(edges) / (gray.shape[0] * gray.shape[1])
+        unique_colors = combined_features['unique_colors']
+        edge_density = combined_features['edge_density']
         
         # A low unique color count combined with 'sharp' perfect edges = Computer Graphic
         is_synthetic_graphic = unique_colors < 50000 and edge_density < 0.05
         
-        # 5. Predict
-        probability = self.model.predict_proba(X)[0] # [Prob_Real, Prob_Fake]
-        prediction = int(self.model.predict(X)[0])    # 0 for Real, 1 for Fake
-        
         trust_score = float(probability[0]) if prediction == 0 else float(probability[1])
         
         # Mapping model labels to 3-Tier Classification
@@ -117,3 +158,7 @@ class ForensicAnalyzer:
             "raw_probability": [float(p) for p in probability],
             "status": "success"
         }
+
+    def analyze_bytes(self, image_bytes):
+        """Processes image bytes and returns forensic report."""
+        return self.score_features([self.extract_features(image_bytes)])[0]
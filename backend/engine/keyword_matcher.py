@@ -0,0 +1,72 @@
+import re
+
+# Bengali block; feeds mixing Bengali entries in are filtered out by the scraper
+BENGALI_CHARS = re.compile("[\u0980-\u09FF]")
+
+
+def _trie_pattern(keywords):
+    """
+    Regex for a set of literal keywords, built as a trie: alternatives at each
+    node start with different characters, so matching at a position costs
+    O(keyword length) however many keywords there are, and the optional
+    tails make it prefer the longest keyword.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Precompiled substring matcher for a keyword list (or {label: keywords}).
+
+    One pass over the text finds every keyword occurring anywhere in it,
+    overlaps included, same as running `kw in text` for each keyword.
+    Matching is case-insensitive (keywords and text are lowercased).
+    """
+
+    def __init__(self, keywords):
+        if isinstance(keywords, dict):
+            groups = keywords
+        else:
+            groups = {None: keywords}
+        self.labels_for = {}
+        for label, words in groups.items():
+            for word in words:
+                if not word:
+                    continue
+                self.labels_for.setdefault(word.lower(), set()).add(label)
+
+        # The scan reports the longest keyword starting at each position;
+        # shorter keywords starting there are its prefixes
+        words = sorted(self.labels_for)
+        self.prefixes = {w: {p for p in words if w.startswith(p)} for w in words}
+        self.pattern = re.compile("(?=(" + _trie_pattern(words) + "))") if words else None
+
+    def matches(self, text):
+        """Set of keywords found in text."""
+        found = set()
+        if self.pattern is None or not text:
+            return found
+        for longest in set(self.pattern.findall(text.lower())):
+            found |= self.prefixes[longest]
+        return found
+
+    def labels(self, text):
+        """Set of labels with at least one keyword in text."""
+        labels = set()
+        for keyword in self.matches(text):
+            labels |= self.labels_for[keyword]
+        return labels
@@ -0,0 +1,61 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Timings dict of the call currently being measured (None = not measuring)
+_current = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Collects {stage: seconds} for everything timed inside the block."""
+    timings = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record(stage_name, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings[stage_name] = timings.get(stage_name, 0.0) + seconds
+
+
+@contextmanager
+def stage(stage_name):
+    """Times a block as one stage (a no-op outside collect_timings)."""
+    if _current.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage_name, time.perf_counter() - started)
+
+
+def timed(stage_name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return fn(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(stage_name, time.perf_counter() - started)
+    return wrapper
+
+
+def instrument(obj, stages):
+    """
+    Wraps obj's methods ({method name: stage name}) with timers, on this
+    instance only. Internal self.method() calls go through the wrappers too,
+    so pipeline code needs no changes to report per-stage timings.
+    """
+    for method_name, stage_name in stages.items():
+        setattr(obj, method_name, timed(stage_name, getattr(obj, method_name)))
+    return obj
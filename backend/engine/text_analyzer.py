@@ -1,11 +1,13 @@
 import tldextract
 from urllib.parse import urlparse
-import difflib
-from textblob import TextBlob
 import pickle
 import os
 import xgboost
 import numpy as np
+from engine.typosquat_index import TyposquatIndex
+from engine.text_document import TextDocument, as_document
+from engine.stage_timer import instrument
+from engine.keyword_matcher import KeywordMatcher
 
 class TextForensics:
     def __init__(self):
@@ -24,6 +26,9 @@ class TextForensics:
             "dailywire.com", "breitbart.com"
         }
         
+        # Step 4 index: lookalike candidates are precomputed once per trusted list
+        self.typosquat_index = TyposquatIndex(self.TRUSTED_DOMAINS)
+        
         # Load the Real-World AI Model (Trained in Colab)
         self.model_path = os.path.join(os.path.dirname(__file__), '..', '..', 'model', 'text_model', 'text_forensic_model.pkl')
         self.vectorizer_path = os.path.join(os.path.dirname(__file__), '..', '..', 'model', 'text_model', 'tfidf_vectorizer.pkl')
@@ -45,6 +50,21 @@ class TextForensics:
             "miracle", "secret", "reveal", "exposed", "urgent", "warning", "gone wrong",
             "mystery", "discovery", "insane", "miraculous", "must-see", "must see"
         }
+        self.clickbait_matcher = KeywordMatcher(self.CLICKBAIT_SIGNALS)
+        
+        # Per-stage timers for /metrics (free unless timings are being collected)
+        instrument(self, {
+            "analyze_url": "url",
+            "analyze_title_linguistics": "title_linguistics",
+            "analyze_title_clickbait": "title_clickbait",
+            "analyze_title_sentiment": "title_sentiment",
+            "analyze_title_tone": "title_tone",
+            "analyze_description_alignment": "description_alignment",
+            "analyze_description_density": "description_density",
+            "analyze_description_sentiment": "description_sentiment",
+            "analyze_description_quality": "description_quality",
+            "analyze_with_ai_batch": "ai_model",
+        })
         
         print("Text Forensics Core Initialized with Clickbait Shield")
 
@@ -92,8 +112,9 @@ class TextForensics:
             return 1.0
             
         # 2. Check for subdomains of trusted domains (e.g., news.bbc.co.uk)
-        for trusted in self.TRUSTED_DOMAINS:
-            if full_host.endswith("." + trusted):
+        parts = full_host.split(".")
+        for i in range(1, len(parts)):
+            if ".".join(parts[i:]) in self.TRUSTED_DOMAINS:
                 return 1.0
         
         # 3. Exact Match in Untrusted/Satire List
@@ -112,15 +133,10 @@ class TextForensics:
         """
         Step 4: Lookalike / Typosquatting Analysis
         Checks if full_host is "dangerously similar" to any trusted domain.
+        Only the index candidates are scored, so cost does not grow with the list.
         """
-        for trusted in self.TRUSTED_DOMAINS:
-            # Calculate similarity ratio (0.0 to 1.0)
-            similarity = difflib.SequenceMatcher(None, full_host, trusted).ratio()
-            
-            # If 85% to 99% similar (Not exact match, already handled in Step 2)
-            if 0.85 <= similarity < 1.0:
-                return True
-        return False
+        # If 85% to 99% similar (Not exact match, already handled in Step 2)
+        return self.typosquat_index.find_lookalike(full_host) is not None
 
     def analyze_domain_heuristics(self, decomp):
         """
@@ -194,42 +210,78 @@ class TextForensics:
         """
         New Method: Direct AI Prediction using XGBoost
         """
+        return self.analyze_with_ai_batch([(title, description)])[0]
+
+    def analyze_with_ai_batch(self, pairs):
+        """
+        Batch AI Prediction using XGBoost
+        Builds one sparse TF-IDF matrix for all (title, description) pairs
+        and scores it with a single predict_proba call.
+        """
         if not self.ai_model or not self.vectorizer:
-            return 0.5 # Return neutral if model not loaded
+            return [0.5] * len(pairs) # Return neutral if model not loaded
+        if not pairs:
+            return []
             
         try:
-            combined_text = f"{title} {description}"
+            combined_texts = [f"{title} {description}" for title, description in pairs]
             # Transform text using the same TF-IDF vectorizer from Colab
-            vector = self.vectorizer.transform([combined_text])
+            matrix = self.vectorizer.transform(combined_texts)
             
-            # Predict (0 = REAL, 1 = FAKE in most datasets)
-            prediction = self.ai_model.predict(vector)[0]
-            probability = self.ai_model.predict_proba(vector)[0]
+            # Probability[:, 0] is trust in 'Class 0' (Real)
+            # Probability[:, 1] is trust in 'Class 1' (Fake)
+            probabilities = self.ai_model.predict_proba(matrix)
             
             # Convert to trust score (1.0 = Real, 0.0 = Fake)
-            # Probability[0] is trust in 'Class 0' (Real)
-            # Probability[1] is trust in 'Class 1' (Fake)
-            trust_score = float(probability[0])
-            return round(trust_score, 2)
+            return [round(float(p[0]), 2) for p in probabilities]
         except Exception as e:
             print(f"AI Prediction Error: {e}")
-            return 0.5
+            return [0.5] * len(pairs)
 
     def get_truth_score(self, url: str, title: str, description: str):
         """
         Unified Truth Model (Enhanced with AI)
         Combines URL, Title, Description, and AI patterns.
         """
-        # 1. Run Analysis Engines
-        url_report = self.analyze_url(url)
-        title_report = self.analyze_title(title)
-        desc_report = self.analyze_description(title, description)
-        
-        # 2. Run the Real-World AI Prediction
-        ai_pattern_score = self.analyze_with_ai(title, description)
-        
-        # 3. Weighted Aggregation (Hybrid)
-        # Hierarchy: 40% URL (Source), 30% AI Pattern, 15% Title rules, 15% Desc rules.
+        return self.get_truth_scores([{"url": url, "title": title, "description": description}])[0]
+
+    def get_truth_scores(self, articles):
+        """
+        Batch Unified Truth Model
+        Runs the rule engines over every article and the AI model over the
+        whole batch at once. Each article is a dict with url/title/description.
+        """
+        # 1. Run Analysis Engines (URL reports are shared between articles from the same link)
+        # Each title/description is parsed once and shared by all its analyzers.
+        url_reports = {}
+        rule_reports = []
+        for article in articles:
+            url = article.get('url', '')
+            title_doc = TextDocument(article.get('title', ''))
+            desc_doc = TextDocument(article.get('description', ''))
+            if url not in url_reports:
+                url_reports[url] = self.analyze_url(url)
+            rule_reports.append((
+                url_reports[url],
+                self.analyze_title(title_doc),
+                self.analyze_description(title_doc, desc_doc)
+            ))
+        
+        # 2. Run the Real-World AI Prediction (one matrix for the whole batch)
+        ai_scores = self.analyze_with_ai_batch(
+            [(a.get('title', ''), a.get('description', '')) for a in articles]
+        )
+        
+        return [
+            self.combine_reports(url_report, title_report, desc_report, ai_score)
+            for (url_report, title_report, desc_report), ai_score in zip(rule_reports, ai_scores)
+        ]
+
+    def combine_reports(self, url_report, title_report, desc_report, ai_pattern_score):
+        """
+        Weighted Aggregation (Hybrid)
+        Hierarchy: 40% URL (Source), 30% AI Pattern, 15% Title rules, 15% Desc rules.
+        """
         url_score = url_report.get('trust_score', 0.5)
         title_score = title_report.get('trust_score', 0.5)
         desc_score = desc_report.get('trust_score', 0.5)
@@ -237,7 +289,7 @@ class TextForensics:
         final_truth_score = (url_score * 0.40) + (ai_pattern_score * 0.30) + (title_score * 0.15) + (desc_score * 0.15)
         final_truth_score = round(final_truth_score, 2)
         
-        # 4. Final Truth Mapping
+        # Final Truth Mapping
         if final_truth_score >= 0.8:
             verdict = "REAL / ORIGINAL"
         elif final_truth_score >= 0.45:
@@ -264,13 +316,15 @@ class TextForensics:
         Step 1: Linguistic Flagging
         Checks Title for "Shouting" (ALL CAPS) and Sensational Punctuation.
         """
-        if not title:
+        doc = as_document(title)
+        if not doc:
             return 0.5
             
+        title = doc.text
         score = 1.0 # Start perfect
         
         # 1. ALL CAPS Detection (Shouting)
-        words = title.split()
+        words = doc.split_words
         if len(words) > 0:
             caps_count = sum(1 for w in words if w.isupper() and len(w) > 1)
             caps_ratio = caps_count / len(words)
@@ -297,17 +351,15 @@ class TextForensics:
         Step 2: Clickbait Keyword Filtering
         Scans title for sensationalist trigger words.
         """
-        if not title:
+        doc = as_document(title)
+        if not doc:
             return 1.0
             
         score = 1.0
-        title_lower = title.lower()
+        title_lower = doc.lower
         
-        # Count matches
-        match_count = 0
-        for signal in self.CLICKBAIT_SIGNALS:
-            if signal in title_lower:
-                match_count += 1
+        # Count distinct signals (one precompiled pass over the title)
+        match_count = len(self.clickbait_matcher.matches(title_lower))
                 
         if match_count > 0:
             score -= 0.2
@@ -321,13 +373,13 @@ class TextForensics:
         Step 3: Sentiment Extremity (Emotion/Opinion Check)
         Neutral titles are more likely to be original facts.
         """
-        if not title:
+        doc = as_document(title)
+        if not doc:
             return 1.0
             
         score = 1.0
-        blob = TextBlob(title)
-        polarity = blob.sentiment.polarity       # Range: -1.0 to 1.0 (Most extreme emotions)
-        subjectivity = blob.sentiment.subjectivity # Range: 0.0 to 1.0 (Most opinionated)
+        polarity = doc.sentiment.polarity       # Range: -1.0 to 1.0 (Most extreme emotions)
+        subjectivity = doc.sentiment.subjectivity # Range: 0.0 to 1.0 (Most opinionated)
         
         # 1. Subjectivity (Does it sound like an opinion?)
         if subjectivity > 0.5: # More than 50% opinion
@@ -349,27 +401,27 @@ class TextForensics:
         Step 4: AI Tone Consistency (Grammatical Forensics)
         Checks for Personal Pronouns, Modal Verbs, and Superlatives.
         """
-        if not title:
+        doc = as_document(title)
+        if not doc:
             return 1.0
             
         score = 1.0
-        blob = TextBlob(title)
         
         # 1. Personal Pronouns (I, You, Me, My) - Very rare in professional news
         # POS Tag 'PRP' = Personal Pronoun
-        personal_pronouns = [word for word, tag in blob.tags if tag == 'PRP' or tag == 'PRP$']
+        personal_pronouns = [word for word, tag in doc.tags if tag == 'PRP' or tag == 'PRP$']
         if personal_pronouns:
             score -= 0.2
             
         # 2. Superlatives (Best, Greatest, Worst) - Indicates bias
         # POS Tag 'JJS' = Superlative Adjective, 'RBS' = Superlative Adverb
-        superlatives = [word for word, tag in blob.tags if tag in ['JJS', 'RBS']]
+        superlatives = [word for word, tag in doc.tags if tag in ['JJS', 'RBS']]
         if superlatives:
             score -= 0.1
             
         # 3. Speculative Modal Verbs (Could, Might, May)
         speculative_words = {"could", "might", "may", "maybe", "possibly"}
-        words_lower = set(title.lower().split())
+        words_lower = set(doc.lower.split())
         if speculative_words.intersection(words_lower):
             score -= 0.1
             
@@ -380,14 +432,15 @@ class TextForensics:
         Step 5: Final Title Trust Score Calculation
         Combines Linguistics, Clickbait, Sentiment, and Tone.
         """
-        if not title:
+        doc = as_document(title)
+        if not doc:
             return {"verdict": "ERROR", "score": 0.0, "details": "No title provided"}
 
-        # 1. Run all analysis modules
-        ling_score = self.analyze_title_linguistics(title)
-        click_score = self.analyze_title_clickbait(title)
-        sent_score = self.analyze_title_sentiment(title)
-        tone_score = self.analyze_title_tone(title)
+        # 1. Run all analysis modules (sharing one parse of the title)
+        ling_score = self.analyze_title_linguistics(doc)
+        click_score = self.analyze_title_clickbait(doc)
+        sent_score = self.analyze_title_sentiment(doc)
+        tone_score = self.analyze_title_tone(doc)
         
         # 2. Weighted Average
         # Hierarchy: Clickbait & Linguistics are strongest signals, Sentiment & Tone are supporting.
@@ -418,14 +471,16 @@ class TextForensics:
         Step 1: Title-Description Alignment
         Checks if the description keywords match the title keywords.
         """
-        if not title or not description:
+        title_doc = as_document(title)
+        desc_doc = as_document(description)
+        if not title_doc or not desc_doc:
             return 0.5
             
         # 1. Extract Keywords (Filtering common 'stop' words)
         stop_words = {"a", "the", "is", "in", "at", "of", "and", "for", "with", "to", "on", "it", "by"}
         
-        title_set = {w.lower().strip(",.:?!") for w in title.split() if w.lower() not in stop_words}
-        desc_set = {w.lower().strip(",.:?!") for w in description.split() if w.lower() not in stop_words}
+        title_set = {w.lower().strip(",.:?!") for w in title_doc.split_words if w.lower() not in stop_words}
+        desc_set = {w.lower().strip(",.:?!") for w in desc_doc.split_words if w.lower() not in stop_words}
         
         if not title_set:
             return 1.0
@@ -448,11 +503,11 @@ class TextForensics:
         Step 2: Information Density (Fact/Noun Count)
         Measures the concentration of nouns and proper nouns.
         """
-        if not description:
+        doc = as_document(description)
+        if not doc:
             return 1.0
             
-        blob = TextBlob(description)
-        words = blob.words
+        words = doc.words
         if len(words) == 0:
             return 1.0
             
@@ -460,7 +515,7 @@ class TextForensics:
         # NNP: Names, Places, Organizations
         # NN: Objects, Concepts
         fact_tags = {'NN', 'NNP', 'NNPS', 'NNS'}
-        fact_count = sum(1 for word, tag in blob.tags if tag in fact_tags)
+        fact_count = sum(1 for word, tag in doc.tags if tag in fact_tags)
         
         density_ratio = fact_count / len(words)
         
@@ -478,11 +533,11 @@ class TextForensics:
         Step 3: Description Sentiment (Subjectivity Check)
         Checks if the description body is objective or purely opinionated.
         """
-        if not description:
+        doc = as_document(description)
+        if not doc:
             return 1.0
             
-        blob = TextBlob(description)
-        sentiment = blob.sentiment
+        sentiment = doc.sentiment
         
         score = 1.0
         
@@ -504,10 +559,12 @@ class TextForensics:
         Step 4: Linguistic Quality (Repetition & Robotic Detection)
         Checks if the text is repetitive or lacks structure.
         """
-        if not description:
+        doc = as_document(description)
+        if not doc:
             return 1.0
             
-        words = description.lower().split()
+        description = doc.text
+        words = doc.lower.split()
         if len(words) < 10:
             return 0.7 # Too short to be a quality description
             
@@ -538,14 +595,16 @@ class TextForensics:
         Step 5: Final Description Trust Score Calculation
         Combines Alignment, Density, Sentiment, and Quality.
         """
-        if not description:
+        title_doc = as_document(title)
+        desc_doc = as_document(description)
+        if not desc_doc:
             return {"verdict": "ERROR", "score": 0.0, "details": "No description provided"}
 
-        # 1. Run all analysis modules
-        align_score = self.analyze_description_alignment(title, description)
-        dens_score = self.analyze_description_density(description)
-        sent_score = self.analyze_description_sentiment(description)
-        qual_score = self.analyze_description_quality(description)
+        # 1. Run all analysis modules (sharing one parse of each text)
+        align_score = self.analyze_description_alignment(title_doc, desc_doc)
+        dens_score = self.analyze_description_density(desc_doc)
+        sent_score = self.analyze_description_sentiment(desc_doc)
+        qual_score = self.analyze_description_quality(desc_doc)
         
         # 2. Weighted Average
         # Alignment & Density are our strongest "Fake News" signals for descriptions.
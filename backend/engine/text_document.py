@@ -0,0 +1,53 @@
+from functools import cached_property
+from textblob import TextBlob
+
+from engine.stage_timer import stage
+
+
+class TextDocument:
+    """
+    Per-request parse of a single title or description.
+    Tokens, POS tags and sentiment are computed on first use and then shared
+    by every analyzer, so one get_truth_score call tags each text only once.
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+
+    def __bool__(self):
+        return bool(self.text)
+
+    @cached_property
+    def blob(self):
+        with stage("textblob_parse"):
+            return TextBlob(self.text)
+
+    @cached_property
+    def words(self):
+        with stage("textblob_words"):
+            return self.blob.words
+
+    @cached_property
+    def tags(self):
+        with stage("textblob_tags"):
+            return self.blob.tags
+
+    @cached_property
+    def sentiment(self):
+        with stage("textblob_sentiment"):
+            return self.blob.sentiment
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def split_words(self):
+        return self.text.split()
+
+
+def as_document(text):
+    """Accepts either raw text or an existing TextDocument."""
+    if isinstance(text, TextDocument):
+        return text
+    return TextDocument(text)
@@ -0,0 +1,108 @@
+import difflib
+from collections import Counter, defaultdict
+
+
+class TyposquatIndex:
+    """
+    Precomputed lookalike index over a trusted domain list.
+
+    Returns exactly the same decisions as comparing a host against every
+    trusted domain with difflib.SequenceMatcher and accepting ratios in
+    [min_ratio, 1.0), but only runs SequenceMatcher on the few candidates
+    that survive an exact segment filter.
+
+    Why the filter is safe:
+    - ratio = 2*M / (la + lb), and M can never exceed min(la, lb), so only
+      domains in a narrow length band can qualify.
+    - M matching characters form a common subsequence, so the edit distance
+      is at most k = (1 - min_ratio) * (la + lb).
+    - Each trusted domain is cut into K + 1 + EXTRA_SEGMENTS pieces, where K is
+      the largest k it can ever be compared under, and indexed by
+      (domain length, piece number, text). k edits break at most k pieces, so
+      a lookalike host contains all but k of them, each shifted by no more
+      than k characters. Domains hit by fewer pieces are never scored.
+    """
+
+    EXTRA_SEGMENTS = 3
+
+    def __init__(self, domains, min_ratio=0.85):
+        self.min_ratio = min_ratio
+        self.domains = sorted({d.lower() for d in domains})
+        self.lengths = {len(d) for d in self.domains}
+
+        self.postings = defaultdict(list)
+        self.always_check = [] # Domains too short to cut into enough pieces
+        for domain in self.domains:
+            layout = self._layout(len(domain))
+            if layout is None:
+                self.always_check.append(domain)
+                continue
+            for i, (start, size) in enumerate(layout):
+                self.postings[(len(domain), i, domain[start:start + size])].append(domain)
+
+    def _max_edits(self, la, lb):
+        return int((1 - self.min_ratio) * (la + lb) + 1e-9)
+
+    def _compatible_lengths(self, length):
+        """Lengths lb for which 2*min(la, lb) / (la + lb) can still reach min_ratio."""
+        r = self.min_ratio
+        low = int(length * r / (2 - r))
+        high = int(length * (2 - r) / r) + 1
+        return [lb for lb in range(max(low, 1), high + 1)
+                if 2 * min(length, lb) / (length + lb) >= r]
+
+    def _max_edits_for(self, length):
+        """Largest edit budget this length can be compared under."""
+        return max(self._max_edits(length, other) for other in self._compatible_lengths(length))
+
+    def _layout(self, length):
+        """(start, size) of each piece of a domain with this length, or None if too short."""
+        count = self._max_edits_for(length) + 1 + self.EXTRA_SEGMENTS
+        if length < count:
+            return None
+        base, longer = divmod(length, count)
+        layout = []
+        start = 0
+        for i in range(count):
+            size = base + (1 if i >= count - longer else 0)
+            layout.append((start, size))
+            start += size
+        return layout
+
+    def candidates(self, host):
+        """Trusted domains that could be within min_ratio of host."""
+        host = host.lower()
+        la = len(host)
+        found = set()
+        for lb in self._compatible_lengths(la):
+            if lb not in self.lengths:
+                continue
+            layout = self._layout(lb)
+            if layout is None:
+                continue
+            k = self._max_edits(la, lb)
+            counts = Counter()
+            for i, (start, size) in enumerate(layout):
+                hits = set()
+                for pos in range(max(start - k, 0), min(start + k, la - size) + 1):
+                    hits.update(self.postings.get((lb, i, host[pos:pos + size]), ()))
+                counts.update(hits)
+            # k edits break at most k pieces, so a lookalike keeps the rest
+            need = len(layout) - k
+            found.update(d for d, n in counts.items() if n >= need)
+        allowed = set(self._compatible_lengths(la))
+        found.update(d for d in self.always_check if len(d) in allowed)
+        return found
+
+    def find_lookalike(self, host):
+        """Returns the first trusted domain host imitates, or None."""
+        host = host.lower()
+        for trusted in sorted(self.candidates(host)):
+            matcher = difflib.SequenceMatcher(None, host, trusted)
+            # quick_ratio is a cheap upper bound on ratio
+            if matcher.quick_ratio() < self.min_ratio:
+                continue
+            similarity = matcher.ratio()
+            if self.min_ratio <= similarity < 1.0:
+                return trusted
+        return None
@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import time
+
+# Per-feed HTTP validators and last parsed entries
+FEED_STATE_DB = os.environ.get(
+    "FEED_STATE_DB",
+    os.path.join(os.path.dirname(__file__), "cache", "feed_state.sqlite3")
+)
+
+
+class FeedStateStore:
+    """
+    Remembers each feed's ETag / Last-Modified and the items parsed from its
+    last full download, so an unchanged feed (HTTP 304) costs no body
+    transfer and no parsing.
+    """
+
+    def __init__(self, path=FEED_STATE_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The scraper calls this from its feed-state thread, one call at a time
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS feeds (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                items TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def get_many(self, urls):
+        """Returns {url: {"etag", "last_modified", "items"}} for the feeds we have seen."""
+        states = {}
+        urls = list(urls)
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = self.db.execute(
+                f"SELECT url, etag, last_modified, items FROM feeds WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for url, etag, last_modified, items in rows:
+                states[url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "items": json.loads(items)
+                }
+        return states
+
+    def save_many(self, updates):
+        """updates: iterable of (url, etag, last_modified, items)."""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO feeds (url, etag, last_modified, items, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            [(url, etag, last_modified, json.dumps(items), now) for url, etag, last_modified, items in updates]
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
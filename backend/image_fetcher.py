@@ -0,0 +1,89 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+# Download configuration
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_MB", 15)) * 1024 * 1024
+IMAGE_FETCH_TIMEOUT = float(os.environ.get("IMAGE_FETCH_TIMEOUT", 10))
+IMAGE_FETCH_CONNECTIONS = int(os.environ.get("IMAGE_FETCH_CONNECTIONS", 100))
+IMAGE_FETCH_PER_HOST = int(os.environ.get("IMAGE_FETCH_PER_HOST", 6))
+
+# Some CDNs label images generically; anything else (HTML error pages, video) is rejected
+ALLOWED_GENERIC_TYPES = ("application/octet-stream", "binary/octet-stream")
+
+
+class ImageFetchError(Exception):
+    """Raised when a source image can't be downloaded or isn't acceptable."""
+
+
+class ImageFetcher:
+    """
+    App-lifetime image downloader.
+
+    One pooled httpx client is shared by every request (keep-alive, TLS reuse),
+    with a per-host cap so a single slow CDN can't hold the whole pool.
+    Bodies are streamed into a capped buffer: wrong content types and
+    oversized images are dropped as soon as the headers or the first chunks
+    over the limit arrive, so memory per request stays bounded.
+    """
+
+    def __init__(self, max_bytes=IMAGE_MAX_BYTES, timeout=IMAGE_FETCH_TIMEOUT,
+                 connections=IMAGE_FETCH_CONNECTIONS, per_host=IMAGE_FETCH_PER_HOST):
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.client = httpx.AsyncClient(
+            headers={'User-Agent': 'Mozilla/5.0'},
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections // 2)
+        )
+        # host -> [semaphore, fetches using it]; dropped when the last one finishes,
+        # so the table only holds hosts with downloads in flight
+        self.host_slots = {}
+
+    @asynccontextmanager
+    async def host_slot(self, host):
+        """Holds one of host's per_host download slots."""
+        entry = self.host_slots.get(host)
+        if entry is None:
+            entry = self.host_slots[host] = [asyncio.Semaphore(self.per_host), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.host_slots[host]
+
+    async def fetch(self, url):
+        """Returns the image bytes at url or raises ImageFetchError."""
+        host = urlparse(url).hostname or ""
+        try:
+            async with self.host_slot(host):
+                async with self.client.stream("GET", url) as resp:
+                    if resp.status_code != 200:
+                        raise ImageFetchError(f"Source fetch failed: {resp.status_code}")
+
+                    content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                    if content_type and not content_type.startswith("image/") and content_type not in ALLOWED_GENERIC_TYPES:
+                        raise ImageFetchError(f"Source is not an image ({content_type})")
+
+                    declared = resp.headers.get("Content-Length")
+                    if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                        raise ImageFetchError(f"Image too large ({int(declared)} bytes, max {self.max_bytes})")
+
+                    body = bytearray()
+                    async for chunk in resp.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) > self.max_bytes:
+                            raise ImageFetchError(f"Image too large (over {self.max_bytes} bytes)")
+                    return bytes(body)
+        except httpx.HTTPError as e:
+            raise ImageFetchError(f"Source fetch failed: {type(e).__name__}") from e
+
+    async def close(self):
+        await self.client.aclose()
@@ -1,29 +1,92 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from scraper import get_sampled_news, get_all_news
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel
+from typing import List
+from scraper import get_sampled_news, get_all_news, get_article_store, get_store_writer, shutdown_parse_pool, shutdown_store_writer
+from workers import ForensicsExecutor
+from result_cache import ForensicResultCache
+from image_fetcher import ImageFetcher, ImageFetchError
+from verification_queue import VerificationQueue
+import metrics
 import uvicorn
 import time
-import httpx
-from engine.forensics import ForensicAnalyzer
-from engine.text_analyzer import TextForensics
-
-app = FastAPI(title="Intelligence Feed API")
-
-# Initialize Forensic Analyzer (Image)
-analyzer = None
-try:
-    analyzer = ForensicAnalyzer()
-    print("Forensic AI Core Loaded Successfully")
-except Exception as e:
-    print(f"CRITICAL: Forensic AI Core failed to load: {e}")
-
-# Initialize Text Forensic Analyzer
-text_analyzer = None
-try:
-    text_analyzer = TextForensics()
-    print("Text Forensic AI Core Loaded Successfully")
-except Exception as e:
-    print(f"CRITICAL: Text Forensic AI Core failed to load: {e}")
+
+# Forensic cores (image + text) live in the executor's workers, loaded once at startup
+executor = ForensicsExecutor()
+# Image reports keyed by content hash + model version (created once the model is known)
+result_cache = None
+# Pooled, size-capped image downloads (one client for the app's lifetime)
+image_fetcher = None
+# Scores scraped articles with the text model in the background
+verification_queue = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global result_cache, image_fetcher, verification_queue
+    verification_queue = VerificationQueue(
+        get_article_store(), executor, on_scored=refresh_feed_scores, writer=get_store_writer()
+    )
+    verifier = start_background_task(verification_queue.run())
+    # Start scraping right away so the first /api/feed is already warm
+    refresher = start_background_task(feed_refresher())
+    image_fetcher = ImageFetcher()
+    # Cores load and warm up in the background: the server accepts traffic
+    # immediately and /api/ready reports when analysis can be routed here
+    executor.start()
+    warming = start_background_task(warm_cores())
+    yield
+    # Stop the background work (and any feed rebuild still running) before
+    # the pools and stores it uses are closed
+    tasks = [warming, refresher, verifier]
+    if _feed_refresh is not None:
+        tasks.append(_feed_refresh)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await image_fetcher.close()
+    executor.shutdown()
+    shutdown_parse_pool()
+    shutdown_store_writer()
+    if result_cache:
+        result_cache.close()
+
+def log_task_failure(task):
+    """Done-callback: background tasks have nobody awaiting them, so their errors are printed here."""
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        import traceback
+        print(f"DEBUG: Background task {task.get_name()} failed:")
+        print("".join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+
+def start_background_task(coro):
+    task = asyncio.create_task(coro)
+    task.add_done_callback(log_task_failure)
+    return task
+
+async def warm_cores():
+    global result_cache
+    try:
+        await executor.warmup()
+    except Exception:
+        import traceback
+        print(traceback.format_exc())
+        executor.mark_failed()
+        return
+    if executor.image_ready:
+        result_cache = ForensicResultCache(
+            model_version=executor.model_version, pipeline_version=executor.pipeline_version
+        )
+    if executor.text_ready:
+        # Start on the articles scraped while the cores were loading
+        verification_queue.notify()
+
+app = FastAPI(title="Intelligence Feed API", lifespan=lifespan)
 
 # Enable CORS for Next.js frontend
 app.add_middleware(
@@ -34,67 +97,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class TrackInFlight:
+    """
+    Counts requests in flight per route. Plain ASGI rather than
+    @app.middleware: the app call only returns once the response has been
+    sent, so streamed bodies (/api/analyze-images) stay counted until their
+    last chunk instead of until the endpoint returns.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Label by route path only; unknown paths share one series
+        path = scope["path"] if scope["path"] in ROUTE_PATHS else "other"
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc(path=path)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec(path=path)
+
+app.add_middleware(TrackInFlight)
+
 # Global Cache for stability
 NEWS_CACHE = {
     "data": None,
     "last_updated": 0
 }
 CACHE_TTL = 300 # 5 minutes
+# The background refresher rebuilds the feed this long before the TTL runs out
+FEED_REFRESH_LEAD = 60
+
+# In-flight feed rebuild (single-flight: every caller awaits the same scrape)
+_feed_refresh = None
+
+def assemble_feed(last_sync):
+    """Builds the /api/feed payload from the article store (index queries only, no scraping or scoring)."""
+    store = get_article_store()
+
+    # Each section is one indexed query over everything scraped so far;
+    # ai_score/ai_status are attached once the verification queue has scored a story
+    categorized = {
+        "trending": store.trending(20),
+        "breaking": store.breaking(20),
+        "top": store.latest(20),
+    }
+    for category in ("finance", "sports", "tech", "science", "general"):
+        categorized[category] = store.by_category(category, 20)
+
+    return {
+        "status": "success",
+        "source": "live-sampled",
+        "last_sync": last_sync,
+        "count": store.count(),
+        "sections": categorized,
+        "data": categorized["top"]
+    }
+
+async def build_feed():
+    """Scrapes a fresh sample of feeds into the article store and builds the /api/feed payload from it."""
+    # Scrape a fresh sample; new entries accumulate in the store across refreshes
+    await get_sampled_news(50)
+    if verification_queue:
+        verification_queue.notify()
+    return assemble_feed(time.strftime('%H:%M:%S'))
+
+def refresh_feed_scores():
+    """Re-reads the cached feed's sections so newly verified scores show up before the next scrape."""
+    if NEWS_CACHE["data"]:
+        NEWS_CACHE["data"] = assemble_feed(NEWS_CACHE["data"]["last_sync"])
+
+async def _run_feed_refresh():
+    print("DEBUG: Rebuilding feed cache...")
+    data = await build_feed()
+    NEWS_CACHE["data"] = data
+    NEWS_CACHE["last_updated"] = time.time()
+    return data
+
+def start_feed_refresh():
+    """Starts a feed rebuild unless one is already running; returns the shared task."""
+    global _feed_refresh
+    if _feed_refresh is None or _feed_refresh.done():
+        # Stale /api/feed hits don't await it, so failures are logged by the callback
+        _feed_refresh = start_background_task(_run_feed_refresh())
+    return _feed_refresh
+
+async def feed_refresher():
+    """Background task: keeps NEWS_CACHE rebuilt ahead of its TTL."""
+    while True:
+        try:
+            await start_feed_refresh()
+        except Exception:
+            # Already logged by the rebuild task's done-callback
+            pass
+        age = time.time() - NEWS_CACHE["last_updated"]
+        await asyncio.sleep(max(CACHE_TTL - FEED_REFRESH_LEAD - age, 5))
 
 @app.get("/api/feed")
 async def get_feed():
-    global NEWS_CACHE
     current_time = time.time()
     
-    # Return cached data if it's still fresh
-    if NEWS_CACHE["data"] and (current_time - NEWS_CACHE["last_updated"]) < CACHE_TTL:
-        print("DEBUG: Serving feed from cache")
+    # Stale-while-revalidate: any cached copy is served immediately
+    if NEWS_CACHE["data"]:
+        if (current_time - NEWS_CACHE["last_updated"]) >= CACHE_TTL:
+            print("DEBUG: Cache stale. Serving stale copy while refreshing...")
+            metrics.NEWS_CACHE_REQUESTS.inc(result="stale")
+            start_feed_refresh()
+        else:
+            print("DEBUG: Serving feed from cache")
+            metrics.NEWS_CACHE_REQUESTS.inc(result="hit")
         return NEWS_CACHE["data"]
 
     try:
-        print("DEBUG: Cache expired or empty. Triggering fresh scrape...")
-        # Get a fresh sample of news
-        news_items = await get_sampled_news(50) 
-        
-        # Add deterministic AI verification data (stable across refreshes)
-        import hashlib
-        for item in news_items:
-            # Create a unique but stable seed based on the title
-            seed = int(hashlib.md5(item['title'].encode()).hexdigest(), 16) % 1000
-            # 3-Tier Simulation: 5% Manipulated, 15% Edited, 80% Verified
-            if (seed % 20) == 0: # 5% chance
-                item['ai_score'] = round(0.1 + (seed % 20) / 100, 2) # Range 0.1 - 0.3
-                item['ai_status'] = "manipulated"
-            elif (seed % 5) == 0: # 20% chance (total including 5% above, so ~15% net)
-                item['ai_score'] = round(0.40 + (seed % 25) / 100, 2) # Range 0.4 - 0.65
-                item['ai_status'] = "uncertain"
-            else: # 80% chance
-                item['ai_score'] = round(0.85 + (seed % 10) / 100, 2) # Range 0.85 - 0.95
-                item['ai_status'] = "verified"
-
-        # Categorize
-        categorized = {
-            "trending": [item for item in news_items if item.get('is_trending')][:20],
-            "breaking": [item for item in news_items if item.get('is_breaking')][:20],
-            "top": [item for item in news_items if item.get('is_top')][:20],
-            "finance": [item for item in news_items if item.get('category') == 'finance'][:20],
-            "sports": [item for item in news_items if item.get('category') == 'sports'][:20],
-            "tech": [item for item in news_items if item.get('category') == 'tech'][:20],
-            "science": [item for item in news_items if item.get('category') == 'science'][:20],
-            "general": [item for item in news_items if item.get('category') == 'general'][:20],
-        }
-        
-        NEWS_CACHE["data"] = {
-            "status": "success",
-            "source": "live-sampled",
-            "last_sync": time.strftime('%H:%M:%S'),
-            "count": len(news_items),
-            "sections": categorized,
-            "data": news_items[:20]
-        }
-        NEWS_CACHE["last_updated"] = current_time
-        
-        return NEWS_CACHE["data"]
+        print("DEBUG: Cache empty. Waiting for feed scrape...")
+        metrics.NEWS_CACHE_REQUESTS.inc(result="miss")
+        # shield: a disconnecting client must not cancel the scrape others are waiting on
+        return await asyncio.shield(start_feed_refresh())
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -106,36 +226,147 @@ async def get_feed():
 @app.get("/api/analyze-image")
 async def analyze_image(url: str):
     print(f"DEBUG: Analyzing image URL: {url}")
-    if not analyzer:
+    if not executor.image_ready:
         print("DEBUG: Analyzer not initialized")
-        return {"status": "error", "message": "Neural Core Offline"}
+        return {"status": "error", "message": executor.offline_message("image")}
     
+    # Known URL: the report is a lookup, no download needed
+    cached_key = await result_cache.key_for_url(url) if result_cache else None
+    if cached_key:
+        cached = await result_cache.get(cached_key)
+        if cached is not None:
+            print("DEBUG: Serving image report from cache (url)")
+            return cached
+
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            resp = await client.get(url, headers=headers, timeout=10)
-            if resp.status_code != 200:
-                print(f"DEBUG: Image fetch failed with status {resp.status_code}")
-                return {"status": "error", "message": f"Source fetch failed: {resp.status_code}"}
-            
-            print(f"DEBUG: Image fetched ({len(resp.content)} bytes). Starting forensic pipeline...")
-            result = analyzer.analyze_bytes(resp.content)
-            print(f"DEBUG: Analysis complete. Result: {result['prediction']} (Score: {result['trust_score']})")
-            return result
+        try:
+            image_bytes = await image_fetcher.fetch(url)
+        except ImageFetchError as e:
+            print(f"DEBUG: Image fetch rejected: {e}")
+            return {"status": "error", "message": str(e)}
+        
+        print(f"DEBUG: Image fetched ({len(image_bytes)} bytes). Starting forensic pipeline...")
+        key = None
+        if result_cache:
+            key = result_cache.key_for(image_bytes)
+            cached = await result_cache.get(key)
+            if cached is not None:
+                # Same photo under a new URL
+                await result_cache.remember_url(url, key)
+                print("DEBUG: Serving image report from cache (content)")
+                return cached
+        
+        result = await executor.analyze_image(image_bytes)
+        print(f"DEBUG: Analysis complete. Result: {result.get('prediction')} (Score: {result.get('trust_score')})")
+        # Only successful reports are worth serving again (same rule as the batch path)
+        if result_cache and result.get("status") == "success":
+            await result_cache.put(key, result, url=url)
+        return result
     except Exception as e:
         import traceback
         print(f"DEBUG: Analysis error: {str(e)}")
         print(traceback.format_exc())
         return {"status": "error", "message": f"Analysis crashed: {str(e)}"}
 
+class AnalyzeImagesRequest(BaseModel):
+    urls: List[str]
+
+MAX_ANALYZE_BATCH = 50
+# Downloads in flight per batch request (the fetcher also caps each host)
+ANALYZE_BATCH_CONCURRENCY = 8
+
+async def stream_image_batch(urls):
+    """
+    Yields one NDJSON line per URL, in completion order.
+    Downloads run concurrently, feature extraction is spread over the
+    executor's workers, and feature vectors that become ready together are
+    scored in one predict_proba call.
+    """
+    results = asyncio.Queue()   # (index, url, report) ready to send
+    ready = asyncio.Queue()     # (index, url, cache key, features) waiting for the model
+    fetch_slots = asyncio.Semaphore(ANALYZE_BATCH_CONCURRENCY)
+
+    async def prepare(index, url):
+        try:
+            cached_key = await result_cache.key_for_url(url) if result_cache else None
+            if cached_key:
+                cached = await result_cache.get(cached_key)
+                if cached is not None:
+                    results.put_nowait((index, url, cached))
+                    return
+
+            async with fetch_slots:
+                image_bytes = await image_fetcher.fetch(url)
+
+            key = None
+            if result_cache:
+                key = result_cache.key_for(image_bytes)
+                cached = await result_cache.get(key)
+                if cached is not None:
+                    await result_cache.remember_url(url, key)
+                    results.put_nowait((index, url, cached))
+                    return
+
+            features = await executor.extract_image_features(image_bytes)
+            ready.put_nowait((index, url, key, features))
+        except ImageFetchError as e:
+            results.put_nowait((index, url, {"status": "error", "message": str(e)}))
+        except Exception as e:
+            print(f"DEBUG: Batch analysis error for {url}: {str(e)}")
+            results.put_nowait((index, url, {"status": "error", "message": f"Analysis crashed: {str(e)}"}))
+
+    async def scorer():
+        while True:
+            # Everything extracted while the previous batch was scoring goes in together
+            batch = [await ready.get()]
+            while not ready.empty():
+                batch.append(ready.get_nowait())
+            try:
+                reports = await executor.score_image_features([features for *_, features in batch])
+            except Exception as e:
+                print(f"DEBUG: Batch scoring error: {str(e)}")
+                reports = [{"status": "error", "message": f"Analysis crashed: {str(e)}"}] * len(batch)
+            for (index, url, key, _), report in zip(batch, reports):
+                if result_cache and report.get("status") == "success":
+                    # A cache failure must not cost the client its report (or hang the stream)
+                    try:
+                        await result_cache.put(key, report, url=url)
+                    except Exception as e:
+                        print(f"DEBUG: Result cache write failed for {url}: {str(e)}")
+                results.put_nowait((index, url, report))
+
+    tasks = [asyncio.create_task(prepare(index, url)) for index, url in enumerate(urls)]
+    scoring = asyncio.create_task(scorer())
+    try:
+        for _ in urls:
+            index, url, report = await results.get()
+            yield json.dumps({"index": index, "url": url, **report}) + "\n"
+    finally:
+        # Client gone or batch done: stop anything still running
+        scoring.cancel()
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/analyze-images")
+async def analyze_images(request: AnalyzeImagesRequest):
+    """Analyzes many image URLs at once, streaming each report back as NDJSON as it finishes."""
+    print(f"DEBUG: Analyzing batch of {len(request.urls)} image URLs")
+    if not executor.image_ready:
+        print("DEBUG: Analyzer not initialized")
+        return {"status": "error", "message": executor.offline_message("image")}
+    if len(request.urls) > MAX_ANALYZE_BATCH:
+        return {"status": "error", "message": f"Batch too large (max {MAX_ANALYZE_BATCH} images)"}
+
+    return StreamingResponse(stream_image_batch(request.urls), media_type="application/x-ndjson")
+
 @app.get("/api/verify-news")
 async def verify_news(title: str, url: str = "", description: str = ""):
     """Runs the full TextForensics pipeline on a news article."""
-    if not text_analyzer:
-        return {"status": "error", "message": "Text Neural Core Offline"}
+    if not executor.text_ready:
+        return {"status": "error", "message": executor.offline_message("text")}
     
     try:
-        result = text_analyzer.get_truth_score(url, title, description)
+        result = await executor.score_article(url, title, description)
         return result
     except Exception as e:
         import traceback
@@ -143,12 +374,74 @@ async def verify_news(title: str, url: str = "", description: str = ""):
         print(traceback.format_exc())
         return {"status": "error", "message": f"Analysis failed: {str(e)}"}
 
+class ArticleIn(BaseModel):
+    title: str
+    url: str = ""
+    description: str = ""
+
+class VerifyBatchRequest(BaseModel):
+    articles: List[ArticleIn]
+
+MAX_VERIFY_BATCH = 500
+
+@app.post("/api/verify-news/batch")
+async def verify_news_batch(request: VerifyBatchRequest):
+    """Runs the TextForensics pipeline over many articles with one vectorized AI pass."""
+    if not executor.text_ready:
+        return {"status": "error", "message": executor.offline_message("text")}
+    if len(request.articles) > MAX_VERIFY_BATCH:
+        return {"status": "error", "message": f"Batch too large (max {MAX_VERIFY_BATCH} articles)"}
+    
+    try:
+        articles = [article.model_dump() for article in request.articles]
+        results = await executor.score_articles(articles)
+        return {
+            "status": "success",
+            "count": len(results),
+            "results": results
+        }
+    except Exception as e:
+        import traceback
+        print(f"Batch text analysis error: {str(e)}")
+        print(traceback.format_exc())
+        return {"status": "error", "message": f"Batch analysis failed: {str(e)}"}
+
 @app.get("/api/status")
 async def get_status():
     return {
         "status": "online",
+        "ready": executor.image_ready and executor.text_ready,
+        "timestamp": time.time()
+    }
+
+@app.get("/api/ready")
+async def get_ready(response: Response):
+    """Readiness probe: 200 once every forensic core is loaded and warm, 503 before (or if one failed)."""
+    ready = executor.image_ready and executor.text_ready
+    if ready:
+        status = "ready"
+    elif any(core["state"] == "loading" for core in executor.cores.values()):
+        status = "warming"
+    else:
+        status = "degraded"
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": status,
+        "executor": executor.kind,
+        "workers": executor.workers,
+        "model_version": executor.model_version,
+        "pipeline_version": executor.pipeline_version,
+        "cores": executor.cores,
         "timestamp": time.time()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint: stage latencies, feed fetches, cache and in-flight counts."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+ROUTE_PATHS = {route.path for route in app.routes}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
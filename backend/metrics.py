@@ -0,0 +1,157 @@
+import threading
+
+# Prometheus text exposition (format 0.0.4), kept in-process and dependency-free
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def bind(self, **labels):
+        """Resolves the labels once; returns inc(amount=1) for hot paths."""
+        key = self._key(labels)
+
+        def inc(amount=1):
+            with _lock:
+                self.values[key] = self.values.get(key, 0) + amount
+        return inc
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        self._observe(self._key(labels), value, 1)
+
+    def _observe(self, key, value, times):
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += times
+                    break
+            series["sum"] += value * times
+            series["count"] += times
+
+    def observe_stages(self, timings, label="stage", items=1):
+        """
+        Observes every {stage: seconds} entry from one pipeline run. A run over
+        a batch of `items` is recorded as that many per-item observations of
+        seconds / items, so batched and single calls share one unit.
+        """
+        for stage_name, seconds in timings.items():
+            self._observe(self._key({label: stage_name}), seconds / items, items)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+def render():
+    """Renders every registered metric in Prometheus text format."""
+    with _lock:
+        lines = [line for metric in REGISTRY for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+# Analysis pipelines (timings measured inside the workers, observed here)
+IMAGE_STAGE_SECONDS = Histogram(
+    "forensics_image_stage_seconds", "Time spent in each image forensic stage", ["stage"])
+TEXT_STAGE_SECONDS = Histogram(
+    "forensics_text_stage_seconds", "Time spent in each text forensic stage, per article (batch time split evenly)", ["stage"])
+
+# Scraper
+FEED_FETCH_SECONDS = Histogram("feed_fetch_seconds", "Feed download time", ["feed"])
+FEED_PARSE_SECONDS = Histogram("feed_parse_seconds", "Feed parse time on the parse pool (excludes queueing)", ["feed"])
+FEED_VERIFY_SECONDS = Histogram("feed_verify_seconds", "Upscaled image URL verification (HEAD checks) per feed", ["feed"])
+UPSCALE_RULE_HITS = Counter("image_upscale_rule_hits_total", "Thumbnail URL rewrites, per upscaling rule", ["rule"])
+FEED_FETCH_RESPONSES = Counter("feed_fetch_responses_total", "Feed fetch outcomes (HTTP status, or exception name on failure)", ["feed", "status"])
+
+# Feed verification queue
+ARTICLE_VERIFICATIONS = Counter("article_verifications_total", "Feed articles run through the text model (scored, failed, deferred while the executor is down)", ["result"])
+VERIFICATION_PENDING = Gauge("article_verification_pending", "Listed stories still waiting for a text-model score")
+
+# API
+NEWS_CACHE_REQUESTS = Counter("news_cache_requests_total", "/api/feed cache lookups (hit, stale, miss)", ["result"])
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled", ["path"])
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import re
+import zlib
+import numpy as np
+
+# MinHash/LSH settings. Changing NUM_PERM or BANDS invalidates stored signatures
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard a candidate must reach to join a cluster; BANDS/ROWS put the LSH S-curve around 0.5
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", 0.5))
+# How much of the summary goes into the shingles (titles alone are too short)
+SUMMARY_WORDS = 40
+
+# Universal hashing (a * x + b) mod p over 32-bit token hashes; fits in uint64 without overflow
+_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20240229)
+_A = _rng.integers(1, 2**31, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**31, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "at", "by", "with",
+    "from", "as", "is", "are", "was", "were", "be", "it", "its", "this", "that", "after", "over",
+}
+
+
+def shingles(title, summary=""):
+    """Title words plus word bigrams of title + summary head; stable 32-bit hashes."""
+    title_words = [w for w in _WORD_RE.findall(title.lower()) if w not in STOPWORDS]
+    summary_words = [w for w in _WORD_RE.findall(summary.lower()) if w not in STOPWORDS][:SUMMARY_WORDS]
+    words = title_words + summary_words
+    grams = set(title_words)
+    grams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    if not grams:
+        # No words at all: fall back to the raw title so empty docs don't all collide
+        grams = {title.strip().lower()}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(title, summary=""):
+    """MinHash signature (NUM_PERM uint32 values) of one article."""
+    hashed = shingles(title, summary)
+    return ((_A[:, None] * hashed[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig):
+    """One LSH bucket key per band; articles sharing any key are candidate duplicates."""
+    return [
+        hashlib.blake2b(bytes([band]) + sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Cache configuration
+CACHE_DIR = os.environ.get("FORENSICS_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache"))
+CACHE_MEMORY_ITEMS = int(os.environ.get("FORENSICS_CACHE_MEMORY_ITEMS", 512))
+CACHE_DISK_MB = int(os.environ.get("FORENSICS_CACHE_DISK_MB", 256))
+# How long a URL -> content mapping is trusted before the image is downloaded again
+# (the same URL may start serving a different picture)
+CACHE_URL_TTL = int(os.environ.get("FORENSICS_CACHE_URL_TTL", 6 * 3600))
+
+
+class ForensicResultCache:
+    """
+    Content-addressed cache for image forensic reports.
+
+    Keys are sha256(model version + feature pipeline version + image bytes),
+    so the same photo served by many feeds is analyzed once per model and
+    pipeline. A (version, URL) -> key side index lets repeat requests skip
+    the download until the mapping is older than url_ttl seconds.
+
+    Tier 1: bounded in-memory LRU, used from the event loop.
+    Tier 2: SQLite file that survives restarts, evicted least-recently-used
+            first once its payloads exceed the size budget. Every disk read
+            and write runs on the cache's own thread (which owns the
+            connection), so commits and eviction never stall the loop.
+    """
+
+    def __init__(self, model_version="", pipeline_version="", cache_dir=CACHE_DIR,
+                 memory_items=CACHE_MEMORY_ITEMS, disk_max_bytes=CACHE_DISK_MB * 1024 * 1024,
+                 url_ttl=CACHE_URL_TTL):
+        self.model_version = model_version
+        # Reports depend on the features as much as on the model
+        self.version = f"{model_version}/{pipeline_version}" if pipeline_version else model_version
+        self.url_ttl = url_ttl
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.path = os.path.join(cache_dir, "forensic_results.sqlite3")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache")
+        # Opened lazily on the cache thread, so constructing the cache doesn't block the loop
+        self.db = None
+        self.disk_bytes = 0
+
+    def _open(self):
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)")
+        # The URL index used to be keyed on the URL alone; it's only a shortcut, so rebuild it
+        url_columns = {row[1] for row in self.db.execute("PRAGMA table_info(urls)")}
+        if url_columns and "model_version" not in url_columns:
+            self.db.execute("DROP TABLE urls")
+        # model_version holds the combined model/pipeline version (self.version)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                model_version TEXT NOT NULL,
+                url TEXT NOT NULL,
+                key TEXT NOT NULL,
+                remembered_at REAL NOT NULL,
+                PRIMARY KEY (model_version, url)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_urls_key ON urls(key)")
+        # Mappings made by other model/pipeline versions can never be served again
+        self.db.execute("DELETE FROM urls WHERE model_version != ?", (self.version,))
+        self.db.commit()
+        self.disk_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def key_for(self, image_bytes):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(b"\0")
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def _call(self, fn, args):
+        if self.db is None:
+            self._open()
+        return fn(*args)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread, self._call, fn, args)
+
+    async def key_for_url(self, url):
+        """Key of the report for url under the current model and pipeline, unless the mapping has expired."""
+        return await self._run(self._key_for_url, url)
+
+    def _key_for_url(self, url):
+        row = self.db.execute(
+            "SELECT key FROM urls WHERE model_version = ? AND url = ? AND remembered_at >= ?",
+            (self.version, url, time.time() - self.url_ttl)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _remember_url(self, url, key):
+        self.db.execute(
+            "INSERT OR REPLACE INTO urls (model_version, url, key, remembered_at) VALUES (?, ?, ?, ?)",
+            (self.version, url, key, time.time())
+        )
+
+    async def remember_url(self, url, key):
+        await self._run(self._remember_url_commit, url, key)
+
+    def _remember_url_commit(self, url, key):
+        self._remember_url(url, key)
+        self.db.commit()
+
+    async def get(self, key):
+        """Returns the cached report for key, or None."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+
+        result = await self._run(self._get_disk, key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._remember(key, result)
+        self.hits += 1
+        return result
+
+    def _get_disk(self, key):
+        row = self.db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return json.loads(row[0])
+
+    async def put(self, key, result, url=None):
+        # Serialized here, so a report that can't be stored fails before it's cached anywhere
+        payload = json.dumps(result)
+        await self._run(self._put_disk, key, payload, url)
+        self._remember(key, result)
+
+    def _put_disk(self, key, payload, url):
+        old = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO results (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), time.time())
+        )
+        self.disk_bytes += len(payload) - (old[0] if old else 0)
+        if url:
+            self._remember_url(url, key)
+        self._evict_disk()
+        self.db.commit()
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.disk_max_bytes:
+            rows = self.db.execute(
+                "SELECT key, size FROM results ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.disk_bytes = 0
+                break
+            for key, size in rows:
+                self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.db.execute("DELETE FROM urls WHERE key = ?", (key,))
+                self.disk_bytes -= size
+                if self.disk_bytes <= self.disk_max_bytes:
+                    break
+
+    def close(self):
+        # Queued after any pending writes, so they finish first
+        self.thread.submit(self._close_db)
+        self.thread.shutdown(wait=True)
+
+    def _close_db(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -5,67 +5,198 @@ from bs4 import BeautifulSoup
 import os
 from datetime import datetime
 import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import lxml.html
+import lxml.etree
 
-import re
+from feed_state import FeedStateStore
+from article_store import ArticleStore, ArticleStoreWriter, is_breaking_news
+from engine.keyword_matcher import KeywordMatcher, BENGALI_CHARS
+from upscale_rules import UpscaleRules
+from metrics import FEED_FETCH_SECONDS, FEED_PARSE_SECONDS, FEED_VERIFY_SECONDS, FEED_FETCH_RESPONSES
 
 # Path to the feeds file
 FEEDS_FILE = os.path.join(os.path.dirname(__file__), 'feeds', 'xml_feeds.txt')
 
+# Feed parsing pool (feedparser + HTML parsing are CPU-bound; only network I/O stays on the loop)
+# FEED_PARSE_EXECUTOR: "process" (feeds parse in parallel across cores),
+#                      "thread" (frees the event loop, still shares the GIL)
+#                      or "inline" (parse on the event loop)
+FEED_PARSE_EXECUTOR = os.environ.get("FEED_PARSE_EXECUTOR", "process")
+FEED_PARSE_WORKERS = int(os.environ.get("FEED_PARSE_WORKERS", os.cpu_count() or 1))
+
+# Opened on first scrape
+_feed_state = None
+# Feed state reads and commits run here, one at a time, off the event loop
+_feed_state_thread = None
+
+def get_feed_state():
+    global _feed_state
+    if _feed_state is None:
+        _feed_state = FeedStateStore()
+    return _feed_state
+
+async def feed_state_call(method, *args):
+    global _feed_state_thread
+    if _feed_state_thread is None:
+        _feed_state_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed-state")
+    fn = getattr(get_feed_state(), method)
+    return await asyncio.get_running_loop().run_in_executor(_feed_state_thread, fn, *args)
+
+_article_store = None
+
+def get_article_store():
+    global _article_store
+    if _article_store is None:
+        _article_store = ArticleStore()
+    return _article_store
+
+# Scrapes write through this (clustering and pruning run off the event loop)
+_store_writer = None
+
+def get_store_writer():
+    global _store_writer
+    if _store_writer is None:
+        _store_writer = ArticleStoreWriter()
+    return _store_writer
+
+def shutdown_store_writer():
+    global _store_writer, _feed_state_thread
+    if _store_writer:
+        _store_writer.close()
+        _store_writer = None
+    # Feed state is written by scrapes too; let its last commit finish
+    if _feed_state_thread:
+        _feed_state_thread.shutdown(wait=True)
+        _feed_state_thread = None
+
+_upscale_rules = None
+
+def get_upscale_rules():
+    global _upscale_rules
+    if _upscale_rules is None:
+        _upscale_rules = UpscaleRules.load()
+    return _upscale_rules
+
 def upscale_image_url(url):
     """
     Transforms common news thumbnail URLs into high-resolution versions 
     to provide better pixel data for the Forensic AI.
+    Rules live in feeds/upscale_rules.json (see UpscaleRules).
     """
     if not url:
         return url
-        
-    # 1. Daily Mail: Replace -m- (medium) or -a- (article) with -v- (very large)
-    if "dailymail.co.uk" in url:
-        url = re.sub(r'-(image|article)-[ma]-', r'-\1-v-', url)
-        
-    # 2. Guardian: Force width and higher quality
-    elif "guim.co.uk" in url:
-        url = re.sub(r'width=\d+', 'width=1200', url)
-        url = re.sub(r'quality=\d+', 'quality=100', url)
-        
-    # 3. NY Times: Squashed thumbnails to superJumbo
-    elif "nyt.com" in url:
-        url = url.replace("mediumSquareAt3X", "superJumbo")
-        url = url.replace("thumbStandard", "superJumbo")
-        
-    # 4. Mirror / Reach PLC (Alternates)
-    elif "i2-prod" in url:
-        url = re.sub(r'/ALTERNATES/s\d+/', '/ALTERNATES/s1200/', url)
-        
-    # 5. WordPress / Generic Cloudfront (Dimension strip)
-    # Replaces things like image-150x150.jpg with image.jpg
-    url = re.sub(r'-\d+x\d+(\.(jpg|jpeg|png|webp))', r'\1', url)
-    
-    # 6. Yahoo / Yahoo Finance
-    if "s.yimg.com" in url:
-        url = re.sub(r'--/.*--/', '--/resizer/2.0/--/', url) # Reset resizer if present
-        
-    # 7. BBC News
-    if "bbci.co.uk" in url:
-        url = re.sub(r'/standard/\d+/', '/standard/1200/', url)
-        
-    return url
+    return get_upscale_rules().apply(url)
 
-async def fetch_feed(client, url):
-    """Asynchronously fetch a single RSS feed."""
+async def fetch_feed(client, url, state=None):
+    """
+    Asynchronously fetch a single RSS feed.
+    When we hold validators from a previous fetch the request is conditional,
+    so an unchanged feed answers 304 with no body.
+    Returns (status_code, text, etag, last_modified); status_code is None on error.
+    """
+    headers = {}
+    if state:
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+    started = time.perf_counter()
     try:
-        response = await client.get(url, timeout=8.0)
+        response = await client.get(url, headers=headers, timeout=8.0)
+        FEED_FETCH_SECONDS.observe(time.perf_counter() - started, feed=url)
+        FEED_FETCH_RESPONSES.inc(feed=url, status=response.status_code)
         if response.status_code == 200:
-            return response.text
+            return 200, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified')
+        elif response.status_code == 304:
+            return 304, None, None, None
         else:
             print(f"Fetch failed for {url}: Status {response.status_code}")
+            return response.status_code, None, None, None
     except Exception as e:
+        FEED_FETCH_SECONDS.observe(time.perf_counter() - started, feed=url)
+        FEED_FETCH_RESPONSES.inc(feed=url, status=type(e).__name__)
         print(f"Error fetching {url}: {type(e).__name__} - {str(e)}")
-    return None
+    return None, None, None, None
+
+# Tracking pixels / icons that are never the article image
+IGNORED_IMAGE_HINTS = ('pixel', 'tracker', 'icon', 'logo.png')
+
+def _qualifying_image(src):
+    return bool(src) and not any(x in src.lower() for x in IGNORED_IMAGE_HINTS)
 
-def extract_image(entry):
+# Whitespace as BeautifulSoup (and HTML) defines it; \xa0 from &nbsp; is text
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+WHITESPACE_PRESERVING_TAGS = ('pre', 'textarea')
+
+def _collapse_blank_strings(doc):
+    """
+    BeautifulSoup stores a whitespace-only string as one '\\n' (if it had a
+    newline) or one ' ', except inside <pre>/<textarea>; do the same to
+    every whitespace-only text and tail so the text comes out identical.
+    """
+    preserved = set()
+    for element in doc.iter(*WHITESPACE_PRESERVING_TAGS):
+        preserved.update(element.iter())
+    for element in doc.iter():
+        text = element.text
+        if text and isinstance(element.tag, str) and element not in preserved and not text.strip(ASCII_SPACES):
+            element.text = '\n' if '\n' in text else ' '
+        tail = element.tail
+        if tail and element.getparent() not in preserved and not tail.strip(ASCII_SPACES):
+            element.tail = '\n' if '\n' in tail else ' '
+
+def parse_fragment(html):
+    """
+    Parses one HTML fragment once: returns (first qualifying <img> src or None, plain text).
+    Text matches BeautifulSoup(html, 'lxml').text, whitespace included
+    (script/style/template contents dropped). The one known difference:
+    whitespace between stray end tags at the very start or end can be lost,
+    which the callers' strip() removes anyway.
+    """
+    if not html:
+        return None, ""
+    # Fast path: no markup, entities or CRs, nothing to parse
+    # (the parser drops leading whitespace before the first text)
+    if '<' not in html and '&' not in html and '\r' not in html:
+        return None, html.lstrip(ASCII_SPACES)
+
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:
+        # Nothing but comments/whitespace
+        return None, ""
+    except ValueError:
+        # e.g. an XML encoding declaration inside a str; let BeautifulSoup cope
+        soup = BeautifulSoup(html, 'lxml')
+        img = next((i.get('src') for i in soup.find_all('img') if _qualifying_image(i.get('src'))), None)
+        return img, soup.text
+
+    image = next((i.get('src') for i in doc.iter('img') if _qualifying_image(i.get('src'))), None)
+    # Before stripping: BeautifulSoup collapses the strings on either side of a <script> separately
+    _collapse_blank_strings(doc)
+    lxml.etree.strip_elements(doc, 'script', 'style', 'template', with_tail=False)
+    return image, doc.text_content()
+
+class EntryFragments:
+    """Per-entry parse cache: each distinct HTML fragment is parsed at most once."""
+
+    def __init__(self):
+        self.parsed = {}
+
+    def get(self, html):
+        result = self.parsed.get(html)
+        if result is None:
+            result = self.parsed[html] = parse_fragment(html)
+        return result
+
+def extract_image(entry, fragments=None):
     """
     Extract the best possible image from an RSS entry with enhanced robustness.
+    Pass the entry's EntryFragments to share HTML parses with the summary text.
     """
     # 1. Direct 'image' or 'links' check
     if 'image' in entry and isinstance(entry.image, dict):
@@ -90,7 +221,9 @@ def extract_image(entry):
             if 'url' in thumb:
                 return thumb['url']
 
-    # 4. Parse description or summary HTML for <img> tags
+    # 4. First qualifying <img> in the description, summary or content HTML
+    if fragments is None:
+        fragments = EntryFragments()
     for field in ['description', 'summary', 'content']:
         content_val = ""
         if field == 'content' and 'content' in entry:
@@ -99,13 +232,9 @@ def extract_image(entry):
             content_val = entry[field]
             
         if content_val:
-            soup = BeautifulSoup(content_val, 'lxml')
-            img = soup.find('img')
-            if img and img.get('src'):
-                src = img.get('src')
-                # Ignore small tracking pixels or icons
-                if not any(x in src.lower() for x in ['pixel', 'tracker', 'icon', 'logo.png']):
-                    return src
+            src, _ = fragments.get(content_val)
+            if src:
+                return src
 
     return None
 
@@ -117,38 +246,79 @@ CATEGORY_MAP = {
     "science": ["science", "nature.com", "nasa", "space.com", "technologyreview"],
 }
 
+# One precompiled scan finds every category keyword in a URL
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_MAP)
+
 def get_category(url, title, summary):
     """Determine category based on URL and content."""
-    url_lower = url.lower()
-    text_lower = (title + " " + summary).lower()
-    
-    for category, keywords in CATEGORY_MAP.items():
-        if any(kw in url_lower for kw in keywords):
+    matched = CATEGORY_MATCHER.labels(url)
+
+    # First category (in CATEGORY_MAP order) with a keyword in the URL
+    for category in CATEGORY_MAP:
+        if category in matched:
             return category
     
     # Default is 'general'
     return "general"
 
-async def verify_image_url(client, upscaled_url, original_url):
+# Upscaled-URL verification
+# Outcomes are remembered so the same thumbnail isn't re-probed every scrape;
+# failures expire sooner since they are often just a slow CDN.
+IMAGE_VERIFY_CONCURRENCY = int(os.environ.get("IMAGE_VERIFY_CONCURRENCY", 32))
+IMAGE_VERIFY_CACHE_ITEMS = int(os.environ.get("IMAGE_VERIFY_CACHE_ITEMS", 20000))
+IMAGE_VERIFY_OK_TTL = 24 * 3600
+IMAGE_VERIFY_FAIL_TTL = 3600
+
+_verified_upscales = OrderedDict() # upscaled_url -> (exists, checked_at)
+
+def _cached_upscale_check(upscaled_url):
+    cached = _verified_upscales.get(upscaled_url)
+    if cached is None:
+        return None
+    exists, checked_at = cached
+    ttl = IMAGE_VERIFY_OK_TTL if exists else IMAGE_VERIFY_FAIL_TTL
+    if time.time() - checked_at > ttl:
+        del _verified_upscales[upscaled_url]
+        return None
+    _verified_upscales.move_to_end(upscaled_url)
+    return exists
+
+def _remember_upscale_check(upscaled_url, exists):
+    _verified_upscales[upscaled_url] = (exists, time.time())
+    _verified_upscales.move_to_end(upscaled_url)
+    while len(_verified_upscales) > IMAGE_VERIFY_CACHE_ITEMS:
+        _verified_upscales.popitem(last=False)
+
+async def verify_image_url(client, upscaled_url, original_url, semaphore=None):
     """
     Tries to see if the upscaled URL exists. Falls back to original if it fails.
     """
     if upscaled_url == original_url:
         return original_url
-        
-    try:
-        # Perform a quick HEAD request to check for 404/Exists
-        # We use a short timeout as this is a fallback check
-        resp = await client.head(upscaled_url, timeout=3.0, follow_redirects=True)
-        if resp.status_code == 200:
-            return upscaled_url
-    except Exception:
-        pass
-        
-    return original_url
 
-async def parse_feed(url, html_content, client=None):
-    """Parse the RSS feed content and extract news items."""
+    exists = _cached_upscale_check(upscaled_url)
+    if exists is None:
+        exists = False
+        try:
+            # Perform a quick HEAD request to check for 404/Exists
+            # We use a short timeout as this is a fallback check
+            if semaphore:
+                async with semaphore:
+                    resp = await client.head(upscaled_url, timeout=3.0, follow_redirects=True)
+            else:
+                resp = await client.head(upscaled_url, timeout=3.0, follow_redirects=True)
+            exists = resp.status_code == 200
+        except Exception:
+            pass
+        _remember_upscale_check(upscaled_url, exists)
+
+    return upscaled_url if exists else original_url
+
+def parse_entries(url, html_content):
+    """
+    CPU-bound half of parse_feed: feedparser + per-entry HTML processing.
+    Runs on the parse pool; items come back with their original image URL.
+    """
     if not html_content:
         return []
     
@@ -162,34 +332,26 @@ async def parse_feed(url, html_content, client=None):
         title = entry.get('title', 'No Title')
         
         # Simple language filter: Check for Bengali characters (\u0980-\u09FF)
-        is_bengali = any('\u0980' <= char <= '\u09FF' for char in title)
-        if is_bengali:
+        if BENGALI_CHARS.search(title):
             continue
 
-        orig_image = extract_image(entry)
-        
-        # UPSCALE IMAGE: Convert thumbnails to High-Res for better DNA forensics
-        upscaled = upscale_image_url(orig_image)
-        
-        # STEP 4: Smart Verification & Fallback
-        if client and upscaled != orig_image:
-            image_url = await verify_image_url(client, upscaled, orig_image)
-        else:
-            image_url = upscaled
-        
-        # MANDATORY IMAGE FILTER: Discard any post that doesn't have a valid image
-        if not image_url or not (image_url.startswith('http')):
+        # Each HTML fragment is parsed once, for both the image and the summary text
+        fragments = EntryFragments()
+        orig_image = extract_image(entry, fragments)
+
+        # MANDATORY IMAGE FILTER: Discard any post without a valid image
+        if not orig_image or not orig_image.startswith('http'):
             continue
 
         # Clean up summary
         summary = ""
         if 'description' in entry:
-            summary = BeautifulSoup(entry.description, 'lxml').text.strip()
+            summary = fragments.get(entry.description)[1].strip()
         elif 'summary' in entry:
-            summary = BeautifulSoup(entry.summary, 'lxml').text.strip()
+            summary = fragments.get(entry.summary)[1].strip()
             
         # Also check summary for Bengali characters
-        if any('\u0980' <= char <= '\u09FF' for char in summary):
+        if BENGALI_CHARS.search(summary):
             continue
 
         # Format date and store as timestamp for sorting
@@ -208,22 +370,101 @@ async def parse_feed(url, html_content, client=None):
                 timestamp = 0
 
         # Determine if it's "Breaking" (within last 2 hours)
-        is_breaking = (time.time() - timestamp) < 7200 if timestamp > 0 else False
+        is_breaking = is_breaking_news(timestamp)
 
         news_items.append({
             "title": title,
             "link": entry.get('link', ''),
             "summary": summary[:200] + "..." if len(summary) > 200 else summary,
+            # Untruncated text for the verification queue (kept out of the feed payload)
+            "description": summary,
             "published": published,
             "timestamp": timestamp,
             "source": site_name,
-            "image": image_url,
+            "image": orig_image,
             "category": get_category(url, title, summary),
             "is_breaking": is_breaking
         })
-    
+
     return news_items
 
+_parse_pool = None
+
+def get_parse_pool():
+    """The feed parsing pool (None when parsing inline), created on first use."""
+    global _parse_pool
+    if _parse_pool is None and FEED_PARSE_EXECUTOR != "inline":
+        if FEED_PARSE_EXECUTOR == "process":
+            # spawn: workers start clean instead of inheriting the server's loop and sockets
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=max(1, FEED_PARSE_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        elif FEED_PARSE_EXECUTOR == "thread":
+            _parse_pool = ThreadPoolExecutor(max_workers=max(1, FEED_PARSE_WORKERS), thread_name_prefix="feed-parse")
+        else:
+            raise ValueError(f"Unknown feed parse executor: {FEED_PARSE_EXECUTOR}")
+        print(f"Feed parse pool started ({FEED_PARSE_EXECUTOR}, {max(1, FEED_PARSE_WORKERS)} workers)")
+    return _parse_pool
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+def timed_parse_entries(url, html_content):
+    """parse_entries plus its run time, measured where it runs (pool queueing excluded)."""
+    started = time.perf_counter()
+    items = parse_entries(url, html_content)
+    return items, time.perf_counter() - started
+
+async def parse_feed(url, html_content, client=None, verify_semaphore=None):
+    """
+    Parse the RSS feed content and extract news items.
+    Parsing runs on the parse pool; entries are filtered first, then every
+    upscaled image of the survivors is verified concurrently, so a feed costs
+    one HEAD round trip rather than one per entry.
+    """
+    if not html_content:
+        return []
+
+    pool = get_parse_pool()
+    if pool is None:
+        items, elapsed = timed_parse_entries(url, html_content)
+    else:
+        items, elapsed = await asyncio.get_running_loop().run_in_executor(pool, timed_parse_entries, url, html_content)
+    FEED_PARSE_SECONDS.observe(elapsed, feed=url)
+
+    # UPSCALE IMAGE: Convert thumbnails to High-Res for better DNA forensics
+    # (done here so the per-rule hit counters live in this process)
+    news_items = []
+    for item in items:
+        orig_image = item["image"]
+        upscaled = upscale_image_url(orig_image)
+        # An upscaled URL that isn't http would fail verification and fall back anyway
+        if upscaled and upscaled.startswith('http'):
+            item["image"] = upscaled
+        news_items.append((item, orig_image))
+
+    # STEP 4: Smart Verification & Fallback (all entries at once)
+    if client:
+        if verify_semaphore is None:
+            verify_semaphore = asyncio.Semaphore(IMAGE_VERIFY_CONCURRENCY)
+        checks = {}
+        for item, orig_image in news_items:
+            if item["image"] != orig_image and item["image"] not in checks:
+                checks[item["image"]] = verify_image_url(client, item["image"], orig_image, verify_semaphore)
+        started = time.perf_counter()
+        verified = dict(zip(checks, await asyncio.gather(*checks.values())))
+        if checks:
+            FEED_VERIFY_SECONDS.observe(time.perf_counter() - started, feed=url)
+        for item, orig_image in news_items:
+            if verified.get(item["image"], item["image"]) != item["image"]:
+                item["image"] = orig_image
+
+    return [item for item, _ in news_items]
+
 async def get_all_news():
     """Returns all news from all sources (slow)."""
     with open(FEEDS_FILE, 'r') as f:
@@ -241,13 +482,35 @@ async def get_sampled_news(count=35):
     urls = random.sample(all_urls, min(count, len(all_urls)))
     return await scrape_subset(urls)
 
-async def scrape_subset(urls):
-    """Internal helper to scrape a specific list of URLs."""
+async def stream_feeds(urls):
+    """
+    Fetches and parses feeds concurrently, yielding (url, items) as each
+    feed finishes. Downloads and HEAD checks run on the event loop; parsing
+    runs on the parse pool, so a slow or large feed holds up nothing else.
+    """
     semaphore = asyncio.Semaphore(20)
+    verify_semaphore = asyncio.Semaphore(IMAGE_VERIFY_CONCURRENCY)
+    states = await feed_state_call("get_many", urls)
 
-    async def sem_fetch(client, url):
+    async def load_feed(client, url):
+        state = states.get(url)
         async with semaphore:
-            return await fetch_feed(client, url)
+            status, content, etag, last_modified = await fetch_feed(client, url, state)
+        if status == 304 and state is not None:
+            # Unchanged since last scrape: reuse the entries we parsed then
+            items = state['items']
+            for item in items:
+                item['is_breaking'] = is_breaking_news(item['timestamp'])
+            return url, items, None
+        try:
+            items = await parse_feed(url, content, client, verify_semaphore)
+        except Exception as e:
+            # One broken feed (or a crashed parse worker) shouldn't sink the scrape
+            print(f"DEBUG: Failed to parse {url}: {type(e).__name__}: {e}")
+            return url, [], None
+        if status == 200 and (etag or last_modified):
+            return url, items, (url, etag, last_modified, items)
+        return url, items, None
 
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
@@ -255,39 +518,55 @@ async def scrape_subset(urls):
     }
 
     async with httpx.AsyncClient(headers=headers, follow_redirects=True, verify=False, timeout=10.0) as client:
-        # Create tasks for all URLs
-        fetch_tasks = [sem_fetch(client, url) for url in urls]
-        responses = await asyncio.gather(*fetch_tasks)
-        
-        # Parse all successfully fetched feeds
-        parse_tasks = [parse_feed(url, content, client) for url, content in zip(urls, responses)]
-        results = await asyncio.gather(*parse_tasks)
-        
-        # Flatten the list of lists
-        all_news = [item for sublist in results for item in sublist]
-        
-        # De-duplication and Trending Detection
-        unique_news = []
-        seen_titles = {} 
-        
-        for item in all_news:
-            title_norm = item['title'].lower().strip()
-            if title_norm not in seen_titles:
-                item['trending_score'] = 1
-                seen_titles[title_norm] = len(unique_news)
-                unique_news.append(item)
-            else:
-                idx = seen_titles[title_norm]
-                unique_news[idx]['trending_score'] += 1
-        
-        # Sort by timestamp (Newest First)
-        unique_news.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        for i, item in enumerate(unique_news):
-            item['is_trending'] = item['trending_score'] > 1
-            item['is_top'] = i < 20
-        
-        return unique_news
+        tasks = [asyncio.create_task(load_feed(client, url)) for url in urls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                url, items, update = await finished
+                # Persist validators + entries before anything annotates the item dicts
+                if update:
+                    await feed_state_call("save_many", [update])
+                yield url, items
+        finally:
+            for task in tasks:
+                task.cancel()
+
+async def scrape_subset(urls):
+    """Internal helper to scrape a specific list of URLs."""
+    store_writer = get_store_writer()
+    all_news = []
+    added = 0
+
+    # Each feed is stored as soon as it's parsed (/api/feed reads its sections from the store)
+    async for url, items in stream_feeds(urls):
+        added += await store_writer.call("upsert_many", items)
+        all_news.extend(items)
+
+    pruned = await store_writer.call("prune")
+    stories = await store_writer.call("count")
+    print(f"DEBUG: Article store +{added} new, -{pruned} expired, {stories} stories")
+
+    # De-duplication and Trending Detection (by story cluster from the store)
+    unique_news = []
+    seen_clusters = {}
+
+    for item in all_news:
+        cluster_id = item['cluster_id']
+        if cluster_id not in seen_clusters:
+            item['trending_score'] = 1
+            seen_clusters[cluster_id] = len(unique_news)
+            unique_news.append(item)
+        else:
+            idx = seen_clusters[cluster_id]
+            unique_news[idx]['trending_score'] += 1
+
+    # Sort by timestamp (Newest First)
+    unique_news.sort(key=lambda x: x['timestamp'], reverse=True)
+    
+    for i, item in enumerate(unique_news):
+        item['is_trending'] = item['trending_score'] > 1
+        item['is_top'] = i < 20
+    
+    return unique_news
 
 if __name__ == "__main__":
     # Test run
@@ -297,3 +576,5 @@ if __name__ == "__main__":
     print(f"Scraped {len(news)} items in {end_time - start_time:.2f} seconds.")
     if news:
         print(f"Sample Item: {news[0]}")
+    shutdown_parse_pool()
+    shutdown_store_writer()
@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from engine.keyword_matcher import KeywordMatcher
+from scraper import CATEGORY_MAP, get_category
+
+
+def loop_matches(keywords, text):
+    """The original per-keyword scan: `kw in text` on lowercased text."""
+    text = text.lower()
+    return {kw.lower() for kw in keywords if kw and kw.lower() in text}
+
+
+def loop_category(url):
+    """The original get_category loop."""
+    url_lower = url.lower()
+    for category, keywords in CATEGORY_MAP.items():
+        if any(kw in url_lower for kw in keywords):
+            return category
+    return "general"
+
+
+@pytest.mark.parametrize("keywords, text, expected", [
+    # Substrings inside words count, as with `in`
+    (["sport"], "https://www.skysports.com/football", {"sport"}),
+    (["tech"], "arstechnica", {"tech"}),
+    # Overlapping keywords: one a prefix, one nested, one straddling another
+    (["tech", "technology", "technologyreview"], "technologyreview.com", {"tech", "technology", "technologyreview"}),
+    (["nature.com", "re.co", "ure"], "www.nature.com/articles", {"nature.com", "re.co", "ure"}),
+    (["aa", "aaa"], "aaaa", {"aa", "aaa"}),
+    (["abc", "bcd", "cde"], "abcde", {"abc", "bcd", "cde"}),
+    # Case-insensitive, and regex characters are literal
+    (["Inc.com", "9to5mac"], "INCXCOM 9TO5MAC", {"9to5mac"}),
+    (["hacker-news", "qz.com"], "news.ycombinator.com/hacker-news qz.com", {"hacker-news", "qz.com"}),
+    (["forbes"], "", set()),
+])
+def test_matches_like_substring_scan(keywords, text, expected):
+    assert KeywordMatcher(keywords).matches(text) == expected == loop_matches(keywords, text)
+
+
+def test_matches_random_text():
+    rng = random.Random(0)
+    alphabet = "abcde.-"
+    keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(60)]
+    matcher = KeywordMatcher(keywords)
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet + "ABCDE") for _ in range(rng.randint(0, 40)))
+        assert matcher.matches(text) == loop_matches(keywords, text), text
+
+
+def test_labels_follow_keywords():
+    matcher = KeywordMatcher({"a": ["tech"], "b": ["technology"], "c": ["space.com"]})
+    assert matcher.labels("technologyreview.com") == {"a", "b"}
+    assert matcher.labels("myspace.com") == {"c"}
+    assert matcher.labels("nothing here") == set()
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.technologyreview.com/feed",
+    "https://www.espn.com/rss",
+    "https://sportstechnology.example/feed",
+    "https://feeds.bloomberg.com/technology/news.rss",
+    "https://www.nature.com/nature.rss",
+    "https://www.bbc.co.uk/news/rss.xml",
+])
+def test_category_matches_original_loop(url):
+    assert get_category(url, "", "") == loop_category(url)
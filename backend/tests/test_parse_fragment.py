@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+import warnings
+
+import pytest
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scraper import EntryFragments, parse_fragment, _qualifying_image
+
+FRAGMENTS = {
+    "plain": "Just a sentence.",
+    "plain_padded": "   leading and trailing   ",
+    "entities": "Tom &amp; Jerry &lt;3 &nbsp;caf&eacute; &#8217;quoted&#8217; &copy; &#x1F600;",
+    "bare_ampersands": "AT&T and R&D; &bogus; & alone",
+    "nested": "<p>Hello <b>bold <i>nested <a href='x'>link</a></i></b> world</p><p>second</p>",
+    "lists": "<div><ul><li>one</li>\n<li>two</li></ul></div>",
+    "block_whitespace": "<p>line one<br>line two</p>\n\n<p>  spaced   text  </p>\t<p>x</p>",
+    "pre": "<pre>  keep\n\n  this  </pre>\n\n<textarea>  and  this </textarea>",
+    "unclosed": "<p>unclosed <b>bold <i>italic",
+    "stray_end_tags": "</p>stray close</div> text <p>ok",
+    "broken_brackets": "<<p>>weird<</p>> a < b > c",
+    "unterminated_tag": "before <img src=\"http://a/x.jpg\"",
+    "implied_cells": "<table><tr><td>cell1<td>cell2</table>tail",
+    "script_style": "<p>a</p>\n\n<script>var x = '<p>';</script>visible<style>p{}</style> text<template>t</template>",
+    "comments": "<p>a</p><!-- c --><p>b</p>",
+    "only_comment": "<!-- comment -->",
+    "crlf": "text with\r\nCRLF\rCR",
+    "xml_declaration": "<?xml version='1.0' encoding='utf-8'?><p>xml decl</p>",
+    "unicode": "<p>Emoji \U0001F600 and Ünïcödé কা</p>",
+    "images": "<img src='http://a/pixel.gif'><img src='http://a/site-logo.png'><img src=http://a/real.jpg alt=x>after",
+    "image_without_src": "<img alt='none'><p>caption</p>",
+}
+
+
+def soup_fragment(html):
+    """What the scraper computed before parse_fragment: one BeautifulSoup build per use."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", XMLParsedAsHTMLWarning)
+        soup = BeautifulSoup(html, 'lxml')
+    image = next((i.get('src') for i in soup.find_all('img') if _qualifying_image(i.get('src'))), None)
+    return image, soup.text
+
+
+@pytest.mark.parametrize("name", sorted(FRAGMENTS))
+def test_matches_beautifulsoup(name):
+    html = FRAGMENTS[name]
+    assert parse_fragment(html) == soup_fragment(html)
+
+
+def test_expected_text():
+    assert parse_fragment(FRAGMENTS["entities"])[1] == "Tom & Jerry <3 \xa0café ’quoted’ © \U0001F600"
+    assert parse_fragment(FRAGMENTS["block_whitespace"])[1] == "line oneline two\n  spaced   text   x"
+    assert parse_fragment(FRAGMENTS["pre"])[1] == "  keep\n\n  this  \n  and  this "
+    assert parse_fragment(FRAGMENTS["script_style"])[1] == "a\nvisible text"
+    assert parse_fragment(FRAGMENTS["images"]) == ("http://a/real.jpg", "after")
+    assert parse_fragment(FRAGMENTS["only_comment"]) == (None, "")
+    assert parse_fragment("") == (None, "")
+
+
+def test_random_markup_matches_after_strip():
+    # Leading/trailing whitespace next to stray end tags may differ; callers strip() it
+    pieces = ["<p>", "</p>", "<b>", "</b>", "<div>", "</div>", "<pre>", "</pre>", "<br>", "<li>", "</ul>",
+              "<img src='http://a/x.jpg'>", "<!-- c -->", "<script>s<p></script>", "<template>t</template>",
+              "&amp;", "&nbsp;", "&bogus;", "&#8217;", " ", "\n\n", "\t", "\r\n", "word", "<", ">", "&"]
+    rng = random.Random(0)
+    for _ in range(2000):
+        html = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        image, text = parse_fragment(html)
+        old_image, old_text = soup_fragment(html)
+        assert image == old_image, html
+        assert text.strip() == old_text.strip(), html
+
+
+def test_entry_fragments_parse_once(monkeypatch):
+    import scraper
+    calls = []
+    monkeypatch.setattr(scraper, "parse_fragment", lambda html: calls.append(html) or (None, html))
+    fragments = EntryFragments()
+    assert fragments.get("<p>a</p>") == (None, "<p>a</p>")
+    fragments.get("<p>a</p>")
+    fragments.get("<p>b</p>")
+    assert calls == ["<p>a</p>", "<p>b</p>"]
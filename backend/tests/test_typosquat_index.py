@@ -0,0 +1,97 @@
+import difflib
+import os
+import random
+import string
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from engine.typosquat_index import TyposquatIndex
+
+TRUSTED = [
+    "reuters.com", "bbc.co.uk", "bbc.com", "apnews.com", "nytimes.com",
+    "theguardian.com", "aljazeera.com", "bloomberg.com", "forbes.com",
+    "wsj.com", "thehindu.com", "abcdefghijklmnop.com", "x.co",
+]
+ALPHABET = string.ascii_lowercase + string.digits + ".-"
+
+
+def loop_lookalike(domains, host, min_ratio=0.85):
+    """The original full scan from TextForensics.check_typosquatting."""
+    for trusted in domains:
+        similarity = difflib.SequenceMatcher(None, host, trusted).ratio()
+        if min_ratio <= similarity < 1.0:
+            return True
+    return False
+
+
+def mutate(rng, domain, edits):
+    chars = list(domain)
+    for _ in range(edits):
+        op = rng.choice(("insert", "delete", "replace", "swap"))
+        pos = rng.randrange(len(chars))
+        if op == "insert":
+            chars.insert(pos, rng.choice(ALPHABET))
+        elif op == "delete" and len(chars) > 1:
+            del chars[pos]
+        elif op == "replace":
+            chars[pos] = rng.choice(ALPHABET)
+        elif pos + 1 < len(chars):
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+    return "".join(chars)
+
+
+@pytest.fixture(scope="module")
+def domains():
+    rng = random.Random(0)
+    synthetic = {
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 18))) + rng.choice((".com", ".org", ".co.uk"))
+        for _ in range(300)
+    }
+    return sorted(set(TRUSTED) | synthetic)
+
+
+def test_matches_full_scan_on_mutated_hosts(domains):
+    index = TyposquatIndex(domains)
+    rng = random.Random(1)
+    hosts = [mutate(rng, rng.choice(domains), rng.randint(1, 4)) for _ in range(600)]
+    hosts += ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 25))) for _ in range(100)]
+    for host in hosts:
+        assert (index.find_lookalike(host) is not None) == loop_lookalike(domains, host), host
+
+
+def test_exact_match_is_not_a_lookalike(domains):
+    # A ratio of 1.0 is the trusted domain itself, never its imitation
+    index = TyposquatIndex(TRUSTED)
+    for domain in TRUSTED:
+        assert index.find_lookalike(domain) is None
+        assert not loop_lookalike(TRUSTED, domain)
+    # Other, near-identical trusted domains are still compared against it
+    index = TyposquatIndex(domains)
+    for domain in TRUSTED:
+        assert (index.find_lookalike(domain) is not None) == loop_lookalike(domains, domain), domain
+
+
+def test_ratio_threshold_boundary():
+    index = TyposquatIndex(TRUSTED)
+    trusted = "abcdefghijklmnop.com"
+    # Three substitutions in 20 characters: 2 * 17 / 40 is exactly 0.85
+    on_threshold = "xbcdexghijxlmnop.com"
+    # Four: 0.8, just outside
+    below = "xbcdexghijxlmnxp.com"
+    assert difflib.SequenceMatcher(None, on_threshold, trusted).ratio() == 0.85
+    assert difflib.SequenceMatcher(None, below, trusted).ratio() < 0.85
+
+    assert index.find_lookalike(on_threshold) == trusted
+    assert loop_lookalike(TRUSTED, on_threshold)
+    assert index.find_lookalike(below) is None
+    assert not loop_lookalike(TRUSTED, below)
+
+
+def test_short_domains_are_always_checked():
+    index = TyposquatIndex(TRUSTED)
+    assert "x.co" in index.always_check
+    for host in ("x.co", "x.com", "xx.co", "y.co", "wsj.co", "wsj.comm", "wsjj.com", "bbc.con"):
+        assert (index.find_lookalike(host) is not None) == loop_lookalike(TRUSTED, host), host
@@ -0,0 +1,95 @@
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from upscale_rules import UpscaleRules
+
+# One URL per rule in feeds/upscale_rules.json: (rule name, thumbnail URL, upscaled URL)
+CASES = [
+    ("dailymail_large",
+     "https://i.dailymail.co.uk/1s/2024/05/01/article-123-0-image-m-5_1714.jpg",
+     "https://i.dailymail.co.uk/1s/2024/05/01/article-123-0-image-v-5_1714.jpg"),
+    ("guardian_width",
+     "https://i.guim.co.uk/img/media/abc/master/1000.jpg?width=140&dpr=1&s=none",
+     "https://i.guim.co.uk/img/media/abc/master/1000.jpg?width=1200&dpr=1&s=none"),
+    ("guardian_quality",
+     "https://i.guim.co.uk/img/media/abc/master/1000.jpg?quality=85&auto=format",
+     "https://i.guim.co.uk/img/media/abc/master/1000.jpg?quality=100&auto=format"),
+    ("nyt_medium_square",
+     "https://static01.nyt.com/images/2024/05/01/world/01x/01x-mediumSquareAt3X.jpg",
+     "https://static01.nyt.com/images/2024/05/01/world/01x/01x-superJumbo.jpg"),
+    ("nyt_thumb_standard",
+     "https://static01.nyt.com/images/2024/05/01/world/01x/01x-thumbStandard.jpg",
+     "https://static01.nyt.com/images/2024/05/01/world/01x/01x-superJumbo.jpg"),
+    ("reach_alternates",
+     "https://i2-prod.mirror.co.uk/incoming/article1.ece/ALTERNATES/s615/0_photo.jpg",
+     "https://i2-prod.mirror.co.uk/incoming/article1.ece/ALTERNATES/s1200/0_photo.jpg"),
+    ("strip_dimensions",
+     "https://example.org/wp-content/uploads/2024/05/photo-150x150.jpg",
+     "https://example.org/wp-content/uploads/2024/05/photo.jpg"),
+    ("yahoo_resizer",
+     "https://s.yimg.com/ny/api/res/1.2/abc--/YXBwaWQ9aGlnaGxhbmRlcjt3PTk2MDtoPTY0MA--/https://media.zenfs.com/x.jpg",
+     "https://s.yimg.com/ny/api/res/1.2/abc--/resizer/2.0/--/https://media.zenfs.com/x.jpg"),
+    ("bbc_standard",
+     "https://ichef.bbci.co.uk/news/standard/240/cpsprodpb/abc/live/photo.jpg",
+     "https://ichef.bbci.co.uk/news/standard/1200/cpsprodpb/abc/live/photo.jpg"),
+]
+
+
+def original_upscale(url):
+    """The if/elif chain the rule table replaced."""
+    if "dailymail.co.uk" in url:
+        url = re.sub(r'-(image|article)-[ma]-', r'-\1-v-', url)
+    elif "guim.co.uk" in url:
+        url = re.sub(r'width=\d+', 'width=1200', url)
+        url = re.sub(r'quality=\d+', 'quality=100', url)
+    elif "nyt.com" in url:
+        url = url.replace("mediumSquareAt3X", "superJumbo")
+        url = url.replace("thumbStandard", "superJumbo")
+    elif "i2-prod" in url:
+        url = re.sub(r'/ALTERNATES/s\d+/', '/ALTERNATES/s1200/', url)
+    url = re.sub(r'-\d+x\d+(\.(jpg|jpeg|png|webp))', r'\1', url)
+    if "s.yimg.com" in url:
+        url = re.sub(r'--/.*--/', '--/resizer/2.0/--/', url)
+    if "bbci.co.uk" in url:
+        url = re.sub(r'/standard/\d+/', '/standard/1200/', url)
+    return url
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return UpscaleRules.load()
+
+
+def test_every_rule_has_a_case(rules):
+    assert sorted(name for name, _, _ in CASES) == sorted(rule.name for rule in rules.rules)
+
+
+@pytest.mark.parametrize("name, url, expected", CASES, ids=[name for name, _, _ in CASES])
+def test_rule_rewrites_its_host(rules, name, url, expected):
+    assert rules.apply(url) == expected == original_upscale(url)
+    rule = next(rule for rule in rules.rules if rule.name == name)
+    assert rule.apply(url) == (expected, True)
+
+
+@pytest.mark.parametrize("url", [
+    # Publisher path fragments on a host none of the rules are for
+    "https://cdn.example.com/news/standard/240/ALTERNATES/s615/image-m-5-thumbStandard.jpg?width=140&quality=85",
+    "https://images.example.net/photo.jpg",
+])
+def test_other_hosts_are_left_alone(rules, url):
+    assert rules.apply(url) == url
+
+
+def test_host_dispatch_is_by_host_not_substring(rules):
+    # The old chain matched "nyt.com" anywhere in the URL; the table only looks at the host
+    url = "https://cdn.example.com/proxy/static01.nyt.com/01x-thumbStandard.jpg"
+    assert rules.apply(url) == url
+    assert [rule.name for rule in rules.rules_for("static01.nyt.com")] == [
+        "nyt_medium_square", "nyt_thumb_standard", "strip_dimensions"
+    ]
+    assert [rule.name for rule in rules.rules_for("i2-prod.walesonline.co.uk")] == ["reach_alternates", "strip_dimensions"]
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import workers
+from workers import ForensicsExecutor
+
+
+@pytest.fixture
+def warm_gate(monkeypatch):
+    """Stands in for the real cores: warmup blocks until the gate is set, then reports both cores loaded."""
+    gate = threading.Event()
+
+    def init_worker():
+        gate.wait(5)
+
+    def worker_report():
+        return {
+            "pid": os.getpid(), "image": True, "text": True,
+            "model_version": "test", "pipeline_version": "test",
+            "load_seconds": {}, "warmup_seconds": {}, "errors": {}
+        }
+
+    monkeypatch.setattr(workers, "init_worker", init_worker)
+    monkeypatch.setattr(workers, "worker_report", worker_report)
+    return gate
+
+
+def crash():
+    raise BrokenProcessPool("worker died")
+
+
+def test_broken_pool_reloads_cores(warm_gate):
+    async def scenario():
+        executor = ForensicsExecutor(kind="thread", workers=1)
+        executor.start()
+        warm_gate.set()
+        await executor.warmup()
+        assert executor.image_ready and executor.text_ready
+
+        warm_gate.clear()
+        broken = executor.pool
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(crash)
+        assert executor.pool is not broken
+        assert executor.cores["image"]["state"] == "loading"
+        assert executor.cores["text"]["state"] == "loading"
+        assert not executor.image_ready
+
+        warm_gate.set()
+        await executor.rewarming
+        assert executor.cores["image"]["state"] == "ready"
+        assert executor.cores["text"]["state"] == "ready"
+        assert executor.image_ready and executor.text_ready
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_restart_cancels_previous_rewarm(warm_gate):
+    async def scenario():
+        executor = ForensicsExecutor(kind="thread", workers=1)
+        executor.start()
+        executor.restart(executor.pool)
+        first = executor.rewarming
+        executor.restart(executor.pool)
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert executor.rewarming is not first
+
+        warm_gate.set()
+        await executor.rewarming
+        assert executor.cores["image"]["state"] == "ready"
+        executor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+import json
+import os
+import re
+
+from metrics import UPSCALE_RULE_HITS
+
+# Thumbnail -> high-resolution rewrites (one entry per rule; adding a publisher is a data change)
+UPSCALE_RULES_FILE = os.environ.get(
+    "UPSCALE_RULES_FILE",
+    os.path.join(os.path.dirname(__file__), "feeds", "upscale_rules.json")
+)
+# Distinct image hosts whose rule lists are remembered
+UPSCALE_HOST_CACHE_ITEMS = 4096
+
+
+class UpscaleRule:
+    def __init__(self, order, spec):
+        self.order = order
+        self.name = spec["name"]
+        self.hosts = spec["hosts"]
+        self.replace = spec["replace"]
+        self.count_hit = UPSCALE_RULE_HITS.bind(rule=self.name)
+        if "literal" in spec:
+            self.literal = spec["literal"]
+            self.pattern = None
+        else:
+            self.literal = None
+            self.pattern = re.compile(spec["pattern"])
+
+    def apply(self, url):
+        """Returns (rewritten url, whether the rule fired)."""
+        if self.literal is not None:
+            if self.literal not in url:
+                return url, False
+            return url.replace(self.literal, self.replace), True
+        url, count = self.pattern.subn(self.replace, url)
+        return url, count > 0
+
+
+class UpscaleRules:
+    """
+    Host-dispatched URL rewrite table.
+
+    Rules are keyed by host (domain suffix, leading label "i2-prod.*", or
+    "*"), so a URL only runs the precompiled rules for its own host, in
+    file order. Hits are counted per rule for /metrics.
+    """
+
+    def __init__(self, rules):
+        self.rules = [UpscaleRule(i, spec) for i, spec in enumerate(rules)]
+        self.by_suffix = {}
+        self.by_label = {}
+        self.everywhere = []
+        for rule in self.rules:
+            for host in rule.hosts:
+                if host == "*":
+                    self.everywhere.append(rule)
+                elif host.endswith(".*"):
+                    self.by_label.setdefault(host[:-2].lower(), []).append(rule)
+                else:
+                    self.by_suffix.setdefault(host.lower(), []).append(rule)
+        self._host_rules = {}
+
+    @classmethod
+    def load(cls, path=UPSCALE_RULES_FILE):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["rules"])
+
+    def rules_for(self, host):
+        """Rules that apply to host, in file order (cached per host)."""
+        rules = self._host_rules.get(host)
+        if rules is not None:
+            return rules
+        labels = host.split(".")
+        matched = set(self.everywhere)
+        matched.update(self.by_label.get(labels[0], ()))
+        for i in range(len(labels)):
+            matched.update(self.by_suffix.get(".".join(labels[i:]), ()))
+        rules = sorted(matched, key=lambda rule: rule.order)
+        if len(self._host_rules) >= UPSCALE_HOST_CACHE_ITEMS:
+            self._host_rules.clear()
+        self._host_rules[host] = rules
+        return rules
+
+    def apply(self, url):
+        # scheme://[user@]host[:port]/... -> host
+        netloc = url.partition("://")[2].partition("/")[0]
+        host = netloc.rpartition("@")[2].partition(":")[0].lower()
+        for rule in self.rules_for(host):
+            url, fired = rule.apply(url)
+            if fired:
+                rule.count_hit()
+        return url
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import ARTICLE_VERIFICATIONS, VERIFICATION_PENDING
+from workers import CoreOfflineError
+
+# Articles sent to the text model per worker call (one vectorized AI pass each)
+VERIFY_QUEUE_BATCH = int(os.environ.get("VERIFY_QUEUE_BATCH", 64))
+# Seconds to sleep when there's nothing to score (or the text core isn't ready)
+VERIFY_QUEUE_IDLE = float(os.environ.get("VERIFY_QUEUE_IDLE", 30))
+# Seconds a worker call may take before the batch is given up on (and retried later)
+VERIFY_QUEUE_TIMEOUT = float(os.environ.get("VERIFY_QUEUE_TIMEOUT", 120))
+# Longest wait between retries while the executor keeps failing
+VERIFY_QUEUE_MAX_BACKOFF = float(os.environ.get("VERIFY_QUEUE_MAX_BACKOFF", 600))
+# An article the text model fails on is retried after VERIFY_RETRY_SECONDS (doubling),
+# and given up on after VERIFY_MAX_ATTEMPTS failures
+VERIFY_MAX_ATTEMPTS = int(os.environ.get("VERIFY_MAX_ATTEMPTS", 3))
+VERIFY_RETRY_SECONDS = float(os.environ.get("VERIFY_RETRY_SECONDS", 300))
+
+# Failures of the executor rather than of the articles: nothing is recorded
+# and the whole batch is retried once the executor has had time to recover
+EXECUTOR_ERRORS = (BrokenProcessPool, CoreOfflineError, asyncio.TimeoutError)
+
+# TextForensics verdicts -> the feed's ai_status values
+VERDICT_STATUS = {
+    "REAL / ORIGINAL": "verified",
+    "PROCESSED / EDITED": "uncertain",
+    "FAKE / MANIPULATED": "manipulated",
+}
+
+
+class VerificationQueue:
+    """
+    Scores newly scraped articles with the text model, off the request path.
+
+    The queue itself is the article store: stories without a verdict are
+    pulled newest-first in batches, scored by TextForensics on the executor's
+    workers, and written back. /api/feed only reads the stored verdicts.
+    """
+
+    def __init__(self, store, executor, batch_size=VERIFY_QUEUE_BATCH, idle_seconds=VERIFY_QUEUE_IDLE,
+                 on_scored=None, writer=None, timeout=VERIFY_QUEUE_TIMEOUT, max_attempts=VERIFY_MAX_ATTEMPTS,
+                 retry_seconds=VERIFY_RETRY_SECONDS):
+        self.store = store
+        # Verdicts are written through the scraper's ArticleStoreWriter when given,
+        # so the loop never waits on SQLite's write lock behind a clustering transaction
+        self.writer = writer
+        self.executor = executor
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        # Consecutive executor-level failures (sets the back-off)
+        self.executor_failures = 0
+        # Called after each batch is stored (e.g. to refresh the cached feed)
+        self.on_scored = on_scored
+        self.wakeup = asyncio.Event()
+
+    def notify(self):
+        """New articles were stored: skip the idle wait."""
+        self.wakeup.set()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=self.idle_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    async def _score(self, batch):
+        """
+        Returns (scored, failed): [(link_key, ai_score, ai_status)] and
+        [(link_key, error)]. A failing batch is retried one article at a time;
+        EXECUTOR_ERRORS are raised, since they say nothing about the articles.
+        """
+        articles = [article for _, article in batch]
+        try:
+            reports = await asyncio.wait_for(self.executor.score_articles(articles), self.timeout)
+        except EXECUTOR_ERRORS:
+            raise
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"DEBUG: Verification failed for {batch[0][0]}: {e}")
+                ARTICLE_VERIFICATIONS.inc(result="failed")
+                return [], [(batch[0][0], f"{type(e).__name__}: {e}")]
+            scored, failed = [], []
+            for entry in batch:
+                entry_scored, entry_failed = await self._score([entry])
+                scored.extend(entry_scored)
+                failed.extend(entry_failed)
+            return scored, failed
+
+        ARTICLE_VERIFICATIONS.inc(len(reports), result="scored")
+        scored = [
+            (link_key, report['truth_score'], VERDICT_STATUS.get(report['prediction'], "uncertain"))
+            for (link_key, _), report in zip(batch, reports)
+        ]
+        return scored, []
+
+    async def _write(self, method, *args):
+        if self.writer is not None:
+            return await self.writer.call(method, *args)
+        return getattr(self.store, method)(*args)
+
+    async def run_once(self):
+        """Scores one batch. Returns how many articles were processed."""
+        batch = self.store.pending_verification(self.batch_size)
+        if not batch:
+            VERIFICATION_PENDING.set(self.store.count_pending_verification())
+            return 0
+        try:
+            scored, failed = await self._score(batch)
+        except EXECUTOR_ERRORS:
+            ARTICLE_VERIFICATIONS.inc(len(batch), result="deferred")
+            raise
+        if scored:
+            await self._write("save_verifications", scored)
+        if failed:
+            await self._write("save_verification_failures", failed, self.max_attempts, self.retry_seconds)
+        VERIFICATION_PENDING.set(self.store.count_pending_verification())
+        if self.on_scored and scored:
+            self.on_scored()
+        return len(batch)
+
+    def _backoff(self):
+        """Seconds to wait after the executor failed this many times in a row."""
+        return min(self.idle_seconds * 2 ** (self.executor_failures - 1), VERIFY_QUEUE_MAX_BACKOFF)
+
+    async def run(self):
+        """Background task: drains the queue whenever the text core is up."""
+        while True:
+            if not self.executor.text_ready:
+                await self._idle()
+                continue
+            try:
+                processed = await self.run_once()
+                self.executor_failures = 0
+            except EXECUTOR_ERRORS as e:
+                # Left unverified: the same articles are picked up again after the back-off
+                self.executor_failures += 1
+                delay = self._backoff()
+                print(f"DEBUG: Verification deferred ({type(e).__name__}: {e}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                import traceback
+                print(traceback.format_exc())
+                processed = 0
+            if not processed:
+                await self._idle()
@@ -0,0 +1,337 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import IMAGE_STAGE_SECONDS, TEXT_STAGE_SECONDS
+
+# Executor configuration
+# FORENSICS_EXECUTOR: "process" (one model copy per worker, scales with cores)
+#                     or "thread" (one shared model copy, lighter on memory)
+EXECUTOR_KIND = os.environ.get("FORENSICS_EXECUTOR", "process")
+EXECUTOR_WORKERS = int(os.environ.get("FORENSICS_WORKERS", os.cpu_count() or 1))
+# Seconds to wait for every worker process to load and warm its cores
+WARMUP_TIMEOUT = float(os.environ.get("FORENSICS_WARMUP_TIMEOUT", 600))
+
+# Cores owned by this worker (loaded once by init_worker)
+_image_analyzer = None
+_text_analyzer = None
+_core_errors = {}
+_core_load_seconds = {}
+_initialized = False
+
+
+class CoreOfflineError(RuntimeError):
+    """Raised when a task needs a core that failed to load in its worker."""
+
+
+def init_worker(single_threaded=False, reports=None):
+    """
+    Loads the forensic cores once per worker process (or once for the thread
+    pool). Given a reports queue, the process also warms its cores and posts
+    one worker_report() before taking any task.
+    """
+    global _image_analyzer, _text_analyzer, _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    if single_threaded:
+        # Parallelism comes from the pool; keep each worker on one core
+        import cv2
+        cv2.setNumThreads(1)
+
+    started = time.time()
+    try:
+        from engine.forensics import ForensicAnalyzer
+        _image_analyzer = ForensicAnalyzer()
+        print(f"Forensic AI Core Loaded Successfully (pid {os.getpid()})")
+    except Exception as e:
+        _core_errors["image"] = str(e)
+        print(f"CRITICAL: Forensic AI Core failed to load: {e}")
+    _core_load_seconds["image"] = round(time.time() - started, 3)
+
+    started = time.time()
+    try:
+        from engine.text_analyzer import TextForensics
+        _text_analyzer = TextForensics()
+        print(f"Text Forensic AI Core Loaded Successfully (pid {os.getpid()})")
+    except Exception as e:
+        _core_errors["text"] = str(e)
+        print(f"CRITICAL: Text Forensic AI Core failed to load: {e}")
+    _core_load_seconds["text"] = round(time.time() - started, 3)
+
+    if reports is not None:
+        reports.put(worker_report())
+
+
+def worker_status():
+    """Reports which cores this worker has loaded."""
+    return {
+        "pid": os.getpid(),
+        "image": _image_analyzer is not None,
+        "text": _text_analyzer is not None,
+        "model_version": _image_analyzer.model_version if _image_analyzer else None,
+        "pipeline_version": _image_analyzer.pipeline_version if _image_analyzer else None,
+        "load_seconds": dict(_core_load_seconds),
+        "errors": dict(_core_errors)
+    }
+
+
+def _synthetic_image():
+    """A small deterministic JPEG (gradient + noise) that exercises every image stage."""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, 640, dtype=np.float32)[None, :, None]
+    image = np.clip(gradient + rng.normal(0, 20, (480, 640, 3)), 0, 255).astype(np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+WARMUP_ARTICLE = {
+    "url": "https://www.reuters.com/world/",
+    "title": "Officials confirm new budget figures after parliamentary review",
+    "description": "The finance ministry published the revised figures on Tuesday, according to a statement."
+}
+
+
+def warmup_worker():
+    """Runs one synthetic image and article through the loaded cores (first-call costs, caches)."""
+    seconds, errors = {}, {}
+    if _image_analyzer is not None:
+        started = time.time()
+        try:
+            _image_analyzer.analyze_bytes(_synthetic_image())
+        except Exception as e:
+            errors["image"] = f"Warmup failed: {e}"
+        seconds["image"] = round(time.time() - started, 3)
+    if _text_analyzer is not None:
+        started = time.time()
+        try:
+            _text_analyzer.get_truth_scores([WARMUP_ARTICLE])
+        except Exception as e:
+            errors["text"] = f"Warmup failed: {e}"
+        seconds["text"] = round(time.time() - started, 3)
+    return {"pid": os.getpid(), "warmup_seconds": seconds, "errors": errors}
+
+
+def worker_report():
+    """worker_status() after a warmup pass, with warmup failures merged into errors."""
+    status = worker_status()
+    warmup = warmup_worker()
+    status["warmup_seconds"] = warmup["warmup_seconds"]
+    status["errors"].update(warmup["errors"])
+    return status
+
+
+def _timed_call(fn, *args):
+    """Runs fn collecting per-stage timings; returns (result, {stage: seconds})."""
+    from engine.stage_timer import collect_timings
+    started = time.perf_counter()
+    with collect_timings() as timings:
+        result = fn(*args)
+    timings["total"] = time.perf_counter() - started
+    return result, timings
+
+
+def analyze_image_bytes(image_bytes):
+    if _image_analyzer is None:
+        raise CoreOfflineError("Neural Core Offline")
+    return _timed_call(_image_analyzer.analyze_bytes, image_bytes)
+
+
+def extract_image_features(image_bytes):
+    if _image_analyzer is None:
+        raise CoreOfflineError("Neural Core Offline")
+    return _timed_call(_image_analyzer.extract_features, image_bytes)
+
+
+def score_image_features(features_list):
+    if _image_analyzer is None:
+        raise CoreOfflineError("Neural Core Offline")
+    return _timed_call(_image_analyzer.score_features, features_list)
+
+
+def score_articles(articles):
+    if _text_analyzer is None:
+        raise CoreOfflineError("Text Neural Core Offline")
+    return _timed_call(_text_analyzer.get_truth_scores, articles)
+
+
+class ForensicsExecutor:
+    """
+    Runs the CPU-bound forensic pipelines on a worker pool so the event loop
+    stays free for /api/feed and /api/status while images are analyzed.
+    """
+
+    def __init__(self, kind=EXECUTOR_KIND, workers=EXECUTOR_WORKERS):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.pool = None
+        # Process pools only: each worker posts one warmup report here from its initializer
+        self.reports = None
+        # Background re-warm after a broken process pool was replaced
+        self.rewarming = None
+        self.image_ready = False
+        self.text_ready = False
+        self.model_version = None
+        self.pipeline_version = None
+        self.errors = {}
+        # Per-core state for /api/ready: loading -> ready | failed
+        self.cores = {core: {"state": "loading"} for core in ("image", "text")}
+
+    def start(self):
+        """Creates the pool. Cores load in the background; call warmup() to wait for them."""
+        if self.kind == "process":
+            # spawn: workers start clean instead of inheriting the server's loop and sockets
+            context = multiprocessing.get_context("spawn")
+            self.reports = context.Queue()
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(True, self.reports)
+            )
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="forensics")
+        print(f"Forensics executor started ({self.kind}, {self.workers} workers)")
+
+    async def warmup(self):
+        """
+        Brings every worker up (loading its cores), runs a synthetic image and
+        article through each, and only then marks the cores usable.
+        """
+        started = time.time()
+        pool = self.pool
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            # One shared copy of the cores, loaded and warmed once off the event loop
+            await loop.run_in_executor(pool, init_worker)
+            statuses = [await loop.run_in_executor(pool, worker_report)]
+        else:
+            # Warmup runs in each process's initializer, so there is exactly one
+            # report per process. The no-op tasks only make the pool spawn all
+            # of its workers (processes are started on demand).
+            reports, reports_queue = [], self.reports
+
+            def collect():
+                deadline = time.time() + WARMUP_TIMEOUT
+                while len(reports) < self.workers:
+                    reports.append(reports_queue.get(timeout=max(deadline - time.time(), 0.1)))
+
+            spawned = asyncio.gather(*[loop.run_in_executor(pool, os.getpid) for _ in range(self.workers)])
+            await asyncio.gather(spawned, asyncio.to_thread(collect))
+            statuses = reports
+
+        if pool is not self.pool:
+            # The pool broke and was replaced meanwhile; its re-warm reports instead
+            return statuses
+
+        self.model_version = statuses[0]["model_version"]
+        self.pipeline_version = statuses[0]["pipeline_version"]
+        self.errors = {}
+        for report in statuses:
+            self.errors.update(report["errors"])
+
+        for core in self.cores:
+            loaded = all(s[core] for s in statuses)
+            failed = not loaded or core in self.errors
+            self.cores[core] = {
+                "state": "failed" if failed else "ready",
+                "load_seconds": max(s["load_seconds"].get(core, 0.0) for s in statuses),
+                "warmup_seconds": max(s["warmup_seconds"].get(core, 0.0) for s in statuses),
+                "ready_after_seconds": round(time.time() - started, 3),
+                "error": self.errors.get(core)
+            }
+        self.image_ready = self.cores["image"]["state"] == "ready"
+        self.text_ready = self.cores["text"]["state"] == "ready"
+        print(f"Forensics warmup finished in {time.time() - started:.2f}s "
+              f"(image: {self.cores['image']['state']}, text: {self.cores['text']['state']})")
+        return statuses
+
+    def mark_failed(self):
+        """Cores still loading when warmup gave up are reported as failed."""
+        for core in self.cores.values():
+            if core["state"] == "loading":
+                core["state"] = "failed"
+
+    def restart(self, broken_pool):
+        """
+        Replaces a process pool whose worker died (BrokenProcessPool fails every
+        later task) and re-warms it in the background; the cores report
+        "loading" until the new workers are ready.
+        """
+        if broken_pool is not self.pool:
+            return  # Another failed task already restarted it
+        print("WARNING: Forensics worker pool broke; restarting it")
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.image_ready = False
+        self.text_ready = False
+        self.cores = {core: {"state": "loading"} for core in ("image", "text")}
+        self.start()
+        # A re-warm of an earlier (now replaced) pool has nothing left to report
+        if self.rewarming:
+            self.rewarming.cancel()
+        self.rewarming = asyncio.create_task(self._rewarm())
+
+    async def _rewarm(self):
+        try:
+            await self.warmup()
+        except Exception:
+            import traceback
+            print(traceback.format_exc())
+            self.mark_failed()
+
+    def offline_message(self, core):
+        """Error message for a request that needs a core which isn't usable yet."""
+        name = "Neural Core" if core == "image" else "Text Neural Core"
+        if self.cores[core]["state"] == "loading":
+            return f"{name} warming up"
+        return f"{name} Offline"
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            self.restart(pool)
+            raise
+
+    async def analyze_image(self, image_bytes):
+        result, timings = await self.run(analyze_image_bytes, image_bytes)
+        IMAGE_STAGE_SECONDS.observe_stages(timings)
+        return result
+
+    async def extract_image_features(self, image_bytes):
+        features, timings = await self.run(extract_image_features, image_bytes)
+        timings["extract_total"] = timings.pop("total")
+        IMAGE_STAGE_SECONDS.observe_stages(timings)
+        return features
+
+    async def score_image_features(self, features_list):
+        reports, timings = await self.run(score_image_features, features_list)
+        timings["score_batch_total"] = timings.pop("total")
+        IMAGE_STAGE_SECONDS.observe_stages(timings)
+        return reports
+
+    async def score_articles(self, articles):
+        results, timings = await self.run(score_articles, articles)
+        # Batches come from the verification queue, single articles from /api/verify-news
+        TEXT_STAGE_SECONDS.observe_stages(timings, items=len(articles))
+        return results
+
+    async def score_article(self, url, title, description):
+        results = await self.score_articles([{"url": url, "title": title, "description": description}])
+        return results[0]
+
+    def shutdown(self):
+        if self.rewarming:
+            self.rewarming.cancel()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -9,7 +9,7 @@ import argparse
 sys.path.append(os.path.join(os.getcwd(), 'src'))
 
 from preprocessing import ImagePreprocessor
-from extractors import ForensicExtractors
+from extractors import ForensicExtractors, MODEL_FEATURES
 from forgery_detectors import ForgeryDetectors
 
 class NeuralTrustDetector:
@@ -41,12 +41,7 @@ class NeuralTrustDetector:
         combined_features = {**forensic_features, **forgery_features}
         
         # Convert to list for model prediction (ensuring same order as training)
-        # The order must match the columns in the training DataFrame
-        feature_order = [
-            'ela_mean', 'ela_std', 'fft_mean', 'texture_variance', 
-            'noise_mean', 'copy_move_score', 'noise_inconsistency'
-        ]
-        X = [combined_features[f] for f in feature_order]
+        X = [combined_features[f] for f in MODEL_FEATURES]
         X = np.array(X).reshape(1, -1)
 
         # 3. Predict
@@ -1,11 +1,16 @@
+import os
+import sys
 import pandas as pd
 import pickle
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from extractors import MODEL_FEATURES
+
 # Load features
 df = pd.read_csv('forensic_features.csv')
-X = df.drop(['label'], axis=1)
+X = df[MODEL_FEATURES]
 y = df['label']
 
 # Split same as training
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import pickle
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted scikit-learn RandomForestClassifier flattened into plain arrays.
+
+    All trees share one node table (feature, threshold, left, right, leaf
+    probabilities). Leaves point to themselves with an infinite threshold, so
+    every sample/tree pair simply takes max_depth vectorized steps and ends
+    on its leaf; no per-tree Python calls and no joblib dispatch.
+
+    The arrays can be saved as .npy files and loaded back memory-mapped, so
+    the artifact needs neither pickle nor scikit-learn to serve.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            ids = np.arange(offset, offset + n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, ids, tree.children_right + offset).astype(np.int32))
+
+            # Per-node class probabilities, normalized the way DecisionTreeClassifier.predict_proba does
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds),
+            np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.array(roots, dtype=np.int32),
+            model.classes_, max_depth
+        )
+
+    def predict_proba(self, X):
+        # scikit-learn compares float32 inputs against float64 thresholds
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        # cumsum adds the trees in order, matching scikit-learn's running sum exactly
+        total = np.cumsum(self.value[nodes], axis=1)[:, -1, :]
+        return total / len(self.roots)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path):
+        """Writes one .npy per array plus meta.json into directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"classes": self.classes_.tolist(), "max_depth": self.max_depth}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in cls.ARRAYS
+        }
+        return cls(classes=meta["classes"], max_depth=meta["max_depth"], **arrays)
+
+
+def sample_inputs(model, rows=256, seed=0):
+    """Random inputs spread over each feature's split thresholds, so every branch gets exercised."""
+    rng = np.random.default_rng(seed)
+    n_features = model.n_features_in_
+    low = np.full(n_features, np.inf)
+    high = np.full(n_features, -np.inf)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        for f in range(n_features):
+            t = tree.threshold[split & (tree.feature == f)]
+            if t.size:
+                low[f] = min(low[f], t.min())
+                high[f] = max(high[f], t.max())
+    unused = ~np.isfinite(low)
+    low[unused], high[unused] = 0.0, 1.0
+    span = high - low
+    return rng.uniform(low - 0.1 * span, high + 0.1 * span, size=(rows, n_features))
+
+
+def check_parity(model, compiled, X, tolerance=1e-12):
+    """
+    Compares compiled against scikit-learn on X. Returns (ok, max_diff): ok is
+    True when every probability is within tolerance and the predicted labels
+    agree; max_diff is the largest absolute probability difference.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    same_labels = bool(np.array_equal(model.predict(X), compiled.predict(X)))
+    return max_diff <= tolerance and same_labels, max_diff
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compile forensic_model.pkl into a flat array forest')
+    parser.add_argument('--model', type=str, default='forensic_model.pkl', help='Pickled RandomForestClassifier')
+    parser.add_argument('--out', type=str, default='forensic_model.forest', help='Output directory')
+    parser.add_argument('--features-csv', type=str, default=None, help='Optional feature CSV for the parity check')
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    compiled = CompiledForest.from_sklearn(model)
+
+    X = sample_inputs(model)
+    if args.features_csv:
+        import pandas as pd
+        from extractors import MODEL_FEATURES
+        X = np.vstack([X, pd.read_csv(args.features_csv)[MODEL_FEATURES].to_numpy()])
+
+    ok, max_diff = check_parity(model, compiled, X)
+    print(f"Parity on {len(X)} rows: {'OK' if ok else 'MISMATCH'} (max |dp| = {max_diff:.3g})")
+    if not ok:
+        raise SystemExit(1)
+
+    compiled.save(args.out)
+    print(f"Compiled forest ({len(compiled.roots)} trees, {len(compiled.feature)} nodes) saved to '{args.out}'.")
@@ -1,8 +1,19 @@
- import cv2
+import cv2
 import numpy as np
 from PIL import Image
 import io
 
+# Bumped whenever preprocessing, extractors or detectors change the features
+# produced for the same image (cached reports from older pipelines are not reused)
+FEATURE_PIPELINE_VERSION = 1
+
+# Model input columns, in training order. Other extracted features (e.g. the
+# synthetic-graphic signals) are reported but not fed to the classifier.
+MODEL_FEATURES = [
+    'ela_mean', 'ela_std', 'fft_mean', 'texture_variance',
+    'noise_mean', 'copy_move_score', 'noise_inconsistency'
+]
+
 class ForensicExtractors:
     def __init__(self):
         pass
@@ -60,6 +71,22 @@ class ForensicExtractors:
         variance = laplacian.var()
         return variance
 
+    def count_unique_colors(self, image):
+        """
+        Number of distinct BGR colors.
+        Each pixel is packed into one 24-bit integer, so counting is a 1-D sort
+        instead of a row-wise np.unique over (N, 3).
+        """
+        pixels = image.reshape(-1, 3).astype(np.uint32)
+        packed = (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+        packed.sort()
+        return int(np.count_nonzero(np.diff(packed))) + 1
+
+    def get_edge_density(self, gray_image):
+        """Canny edge response per pixel (sharp, flat-colored graphics score low)."""
+        edges = cv2.Canny(gray_image, 100, 200)
+        return np.sum(edges) / (gray_image.shape[0] * gray_image.shape[1])
+
     def extract_all_features(self, image_data):
         """
         Aggregates multiple forensic scores into a single feature vector.
@@ -78,6 +105,10 @@ class ForensicExtractors:
 
         # Noise statistics
         noise_mean = np.mean(image_data['noise_map'])
+
+        # Digital graphic signals (posters have few flat colors)
+        unique_colors = self.count_unique_colors(image_data['original_standardized'])
+        edge_density = self.get_edge_density(image_data['gray'])
         
         # Return a dictionary of features
         return {
@@ -85,7 +116,9 @@ class ForensicExtractors:
             "ela_std": float(ela_std),
             "fft_mean": float(fft_mean),
             "texture_variance": float(texture_var),
-            "noise_mean": float(noise_mean)
+            "noise_mean": float(noise_mean),
+            "unique_colors": unique_colors,
+            "edge_density": float(edge_density)
         }
 
 if __name__ == "__main__":
@@ -2,56 +2,143 @@ import cv2
 import numpy as np
 
 class ForgeryDetectors:
-    def __init__(self):
+    def __init__(self, nfeatures=1000, neighbours=3, max_hamming=10, min_offset=20,
+                 cluster_bin=None, min_cluster_size=3, copy_move="crosscheck"):
         # Initialize the ORB detector for Copy-Move sensing
         # ORB is fast and free to use (unlike SIFT in some OpenCV versions)
         #orb detect a sharp edge , texture pattrun , corner
         #after that it  genertae a numaricode for each keypoint
-        self.orb = cv2.ORB_create(nfeatures=1000)
-        self.bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        self.orb = cv2.ORB_create(nfeatures=nfeatures)
+        # Which copy-move score get_forgery_report uses. The shipped model was
+        # trained on "crosscheck" (constant 0); switching to "knn" changes copy_move_score,
+        # so forensic_features.csv has to be regenerated and the model retrained
+        if copy_move not in ("crosscheck", "knn"):
+            raise ValueError(f"Unknown copy-move detector: {copy_move}")
+        self.copy_move = copy_move
+        self.bf_crosscheck = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        # No cross-check: we want each descriptor's nearest *other* descriptors
+        self.bf = cv2.BFMatcher(cv2.NORM_HAMMING)
+        self.neighbours = neighbours        # Non-self neighbours considered per keypoint
+        self.max_hamming = max_hamming      # Descriptor distance for "identical" patches
+        self.min_offset = min_offset        # Pixels apart before a match counts as a clone
+        # Optional displacement clustering: a pasted region moves all its keypoints
+        # by the same vector, so only keep matches whose (binned) shift is shared
+        self.cluster_bin = cluster_bin
+        self.min_cluster_size = min_cluster_size
+
+    def find_clone_pairs(self, image):
+        """
+        Returns (keypoints, pairs) where pairs is an (M, 2) array of keypoint
+        indices whose descriptors match but whose locations are far apart.
+        """
+        # Convert to grayscale
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        # Find keypoints and descriptors
+        kp, des = self.orb.detectAndCompute(gray, None)
+        
+        if des is None or len(kp) < 10:
+            return kp, np.empty((0, 2), dtype=np.int64) # Not enough detail to detect cloning
+
+        # k nearest neighbours of every descriptor within the same image.
+        # One extra neighbour, since each descriptor normally finds itself first.
+        k = min(self.neighbours + 1, len(kp))
+        knn = self.bf.knnMatch(des, des, k=k)
+        matches = np.array([(m.queryIdx, m.trainIdx, m.distance) for row in knn for m in row])
+        query = matches[:, 0].astype(np.int64)
+        train = matches[:, 1].astype(np.int64)
+        hamming = matches[:, 2]
+
+        # Filter matches (vectorized over the whole match set):
+        # 1. Not the descriptor matched to itself
+        # 2. Distance should be small (high similarity)
+        keep = (query != train) & (hamming < self.max_hamming)
+        pairs = np.sort(np.stack([query[keep], train[keep]], axis=1), axis=1)
+        # A->B and B->A describe the same clone
+        pairs = np.unique(pairs, axis=0)
+        if len(pairs) == 0:
+            return kp, pairs
+
+        # 3. Geometric distance should be large (not the same point)
+        points = np.array([p.pt for p in kp], dtype=np.float32)
+        shift = points[pairs[:, 1]] - points[pairs[:, 0]]
+        far = np.hypot(shift[:, 0], shift[:, 1]) > self.min_offset
+        pairs, shift = pairs[far], shift[far]
+
+        # 4. Optional: keep only shifts shared by a cluster of matches
+        if self.cluster_bin and len(pairs):
+            # Point the vector one canonical way so A->B and B->A bin together
+            flip = (shift[:, 0] < 0) | ((shift[:, 0] == 0) & (shift[:, 1] < 0))
+            shift[flip] *= -1
+            bins = np.floor(shift / self.cluster_bin).astype(np.int64)
+            _, inverse, counts = np.unique(bins, axis=0, return_inverse=True, return_counts=True)
+            pairs = pairs[counts[inverse.ravel()] >= self.min_cluster_size]
+
+        return kp, pairs
 
     def detect_copy_move(self, image):
         """
         Detects parts of the image that have been copied and pasted elsewhere.
         Uses keypoint matching within the same image.
         """
+        if self.copy_move == "knn":
+            return self.detect_copy_move_knn(image)
+        # Cross-checking a descriptor set against itself only ever yields self
+        # matches: every descriptor is its own nearest neighbour at distance 0,
+        # and exact duplicates fail the cross-check. The score the shipped model
+        # was trained on is therefore always 0 (see detect_copy_move_crosscheck),
+        # so ORB and the O(n^2) match are skipped until a retrain switches to "knn"
+        return 0.0
+
+    def detect_copy_move_crosscheck(self, image):
+        """
+        The cross-check score computed in full (always 0, see detect_copy_move).
+        Kept as the reference the constant is tested against.
+        """
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
+
         # Find keypoints and descriptors
         kp, des = self.orb.detectAndCompute(gray, None)
-        
+
         if des is None or len(kp) < 10:
             return 0.0 # Not enough detail to detect cloning
 
-        # Match descriptors with themselves (excluding perfect matches at same location)
-    
-        # For our "Evidence-First" ML model, we'll calculate a 'Cloning Score'
-        
         # Simple heuristic: how many keypoints are 'too similar' despite being in different locations
-        matches = self.bf.match(des, des)
-        
+        matches = self.bf_crosscheck.match(des, des)
+
         # Filter matches:
-        # 1. Distance should be small (high similarity)
-        # 2. Geometric distance should be large (not the same point)
-        cloning_points = 0
-        for m in matches:
-            idx1, idx2 = m.queryIdx, m.trainIdx
-            if idx1 == idx2: continue
-            
-            p1 = kp[idx1].pt
-            p2 = kp[idx2].pt
-            
-            # Calculate physical distance between points
-            dist = np.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2)
-            
-            # If descriptors are identical but locations are far apart (> 20 pixels)
-            if m.distance < 10 and dist > 20: 
-                cloning_points += 1
-                
+        # 1. Not the descriptor matched to itself (almost every cross-checked match is,
+        #    so they are dropped in one pass before any array is built)
+        candidates = [(m.queryIdx, m.trainIdx, m.distance) for m in matches if m.queryIdx != m.trainIdx]
+        if not candidates:
+            return 0.0
+        candidates = np.array(candidates)
+        query = candidates[:, 0].astype(np.int64)
+        train = candidates[:, 1].astype(np.int64)
+
+        # 2. Distance should be small (high similarity)
+        # 3. Geometric distance should be large (not the same point), vectorized over the survivors
+        points = np.array([p.pt for p in kp], dtype=np.float64)
+        shift = points[train] - points[query]
+        dist = np.sqrt(shift[:, 0] ** 2 + shift[:, 1] ** 2)
+        cloning_points = int(np.count_nonzero((candidates[:, 2] < self.max_hamming) & (dist > self.min_offset)))
+
+        # Normalize score
+        return (cloning_points / len(kp)) * 100
+
+    def detect_copy_move_knn(self, image):
+        """
+        k-nearest-neighbour variant of detect_copy_move (opt-in, needs a retrain).
+        Score = percentage of keypoints that belong to a cloned pair.
+        """
+        kp, pairs = self.find_clone_pairs(image)
+        if len(kp) < 10 or len(pairs) == 0:
+            return 0.0
+
+        cloning_points = len(np.unique(pairs))
         # Normalize score
-        score = (cloning_points / len(kp)) * 100 if len(kp) > 0 else 0
-        return score
+        return (cloning_points / len(kp)) * 100
 
     def detect_noise_inconsistency(self, noise_map):
         """
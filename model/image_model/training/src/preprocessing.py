@@ -1,10 +1,75 @@
 import cv2
+import io
 import numpy as np
 import os
+import warnings
+from PIL import Image
+
+# Refuse to decode anything larger than this (decompression bombs, absurd scans)
+MAX_DECODE_PIXELS = 100_000_000
+
+# Decode large images at reduced resolution (IMREAD_REDUCED_*). Off until the
+# model is retrained on reduced decodes: it changes the features of every image
+# with a long side of 2x the target or more. Training and serving must agree.
+REDUCED_DECODE = os.environ.get("REDUCED_DECODE", "0") == "1"
+
+# Reduced JPEG decode modes, largest reduction first
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
 
 class ImagePreprocessor:
-    def __init__(self, target_size=(512, 512)):
+    def __init__(self, target_size=(512, 512), max_pixels=MAX_DECODE_PIXELS, reduced_decode=REDUCED_DECODE):
         self.target_size = target_size
+        self.max_pixels = max_pixels
+        self.reduced_decode = reduced_decode
+
+    def read_dimensions(self, image_bytes):
+        """Reads (width, height) from the image header without decoding pixels; None if unknown."""
+        try:
+            with warnings.catch_warnings():
+                # We apply our own pixel limit below
+                warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+                with Image.open(io.BytesIO(image_bytes)) as header:
+                    return header.size
+        except Image.DecompressionBombError:
+            raise ValueError("Image exceeds decode pixel limit")
+        except Exception:
+            return None
+
+    def decode_flag(self, width, height):
+        """
+        Picks the strongest reduced decode that still leaves the long side at
+        least as large as the target, so resize_with_padding only ever shrinks.
+        The long side is used because EXIF rotation may swap width and height.
+        """
+        long_side = max(width, height)
+        target = max(self.target_size)
+        for factor, flag in REDUCED_DECODE_FLAGS:
+            if long_side // factor >= target:
+                return flag
+        return cv2.IMREAD_COLOR
+
+    def decode_bytes(self, image_bytes):
+        """
+        Decodes encoded image bytes (at the lowest resolution the pipeline
+        needs when reduced_decode is on).
+        """
+        flag = cv2.IMREAD_COLOR
+        dimensions = self.read_dimensions(image_bytes)
+        if dimensions:
+            width, height = dimensions
+            if width * height > self.max_pixels:
+                raise ValueError(f"Image too large to decode ({width}x{height})")
+            if self.reduced_decode:
+                flag = self.decode_flag(width, height)
+
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flag)
+        if img is None:
+            raise ValueError("Invalid image data")
+        return img
 
     def resize_with_padding(self, image):
         """Resizes image maintaining aspect ratio and adds black padding to reach target_size."""
@@ -59,9 +124,14 @@ class ImagePreprocessor:
 
     def process(self, image_path):
         """Complete preprocessing pipeline for a single image."""
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Could not read image at {image_path}")
+        # Same decode as serving (decode_bytes, same REDUCED_DECODE setting),
+        # so training sees the same pixels the API scores
+        with open(image_path, 'rb') as f:
+            image_bytes = f.read()
+        try:
+            img = self.decode_bytes(image_bytes)
+        except ValueError as e:
+            raise ValueError(f"Could not read image at {image_path}: {e}")
             
         # 1. Standardize Size
         raw_processed = self.resize_with_padding(img)
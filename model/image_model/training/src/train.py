@@ -1,26 +1,80 @@
 import os
+import csv
+import argparse
 import pandas as pd
 import pickle
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
 
 # Import our custom modules
 from preprocessing import ImagePreprocessor
-from extractors import ForensicExtractors
+from extractors import ForensicExtractors, MODEL_FEATURES
 from forgery_detectors import ForgeryDetectors
 
+FEATURES_CSV = 'forensic_features.csv'
+# Rows extracted so far (with their source path), appended every checkpoint
+CHECKPOINT_CSV = 'forensic_features.partial.csv'
+# Images that could not be processed, with the reason
+FAILURES_CSV = 'extraction_failures.csv'
+# Column layouts, fixed so every checkpoint append lines up with the header
+FEATURE_COLUMNS = MODEL_FEATURES + ['label']
+CHECKPOINT_COLUMNS = FEATURE_COLUMNS + ['path']
+FAILURE_COLUMNS = ['path', 'label', 'reason']
+
+# Per-process forensic pipeline (built once by _init_worker)
+_pipeline = None
+
+def _init_worker():
+    global _pipeline
+    _pipeline = (ImagePreprocessor(), ForensicExtractors(), ForgeryDetectors())
+
+def _extract_one(job):
+    """Runs the full feature pipeline on one image. Returns (path, label, features, error)."""
+    img_path, label = job
+    preprocessor, extractors, detectors = _pipeline
+    try:
+        # 1. Preprocess
+        processed_data = preprocessor.process(img_path)
+        
+        # 2. Extract Evidence Features
+        forensic_features = extractors.extract_all_features(processed_data)
+        
+        # 3. Extract Forgery Pattern Features
+        forgery_features = detectors.get_forgery_report(
+            processed_data['original_standardized'], 
+            processed_data['noise_map']
+        )
+        
+        # Merge all features
+        return img_path, label, {**forensic_features, **forgery_features}, None
+    except Exception as e:
+        return img_path, label, None, f"{type(e).__name__}: {e}"
+
+def _read_header(path):
+    with open(path, newline='') as f:
+        return next(csv.reader(f), [])
+
+def _append_rows(path, rows, fieldnames):
+    """Appends rows to a CSV (writing the header for a new file) and flushes them to disk."""
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as f:
+        # Diagnostic extras (unique_colors, ...) are not model inputs
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
 class ForensicTrainer:
     def __init__(self, data_dir='archive'):
         self.data_dir = data_dir
-        self.preprocessor = ImagePreprocessor()
-        self.extractors = ForensicExtractors()
-        self.detectors = ForgeryDetectors()
         self.features_list = []
 
-    def collect_features(self):
-        """Iterates through data folders and extracts forensic features."""
-        from tqdm import tqdm
+    def list_images(self):
+        """Returns (path, label) for every image in the data folders."""
         # Reverted to Original Dataset:
         # training_real = Real (0)
         # training_fake = Fake (1)
@@ -29,8 +83,7 @@ class ForensicTrainer:
             'training_fake': 1
         }
         
-        print(f"Starting standard feature extraction from: {self.data_dir}")
-        
+        jobs = []
         for category, label in categories.items():
             dataset_path = os.path.join(self.data_dir, category)
             if not os.path.exists(dataset_path):
@@ -44,34 +97,86 @@ class ForensicTrainer:
                         all_files.append(os.path.join(root, f))
             
             print(f"Found {len(all_files)} images in '{category}'...")
+            jobs.extend((path, label) for path in sorted(all_files))
+        return jobs
 
-            for img_path in tqdm(all_files, desc=f"Extracting {category}"):
-                try:
-                    # 1. Preprocess
-                    processed_data = self.preprocessor.process(img_path)
-                    
-                    # 2. Extract Evidence Features
-                    forensic_features = self.extractors.extract_all_features(processed_data)
-                    
-                    # 3. Extract Forgery Pattern Features
-                    forgery_features = self.detectors.get_forgery_report(
-                        processed_data['original_standardized'], 
-                        processed_data['noise_map']
-                    )
-                    
-                    # Merge all features
-                    combined_features = {**forensic_features, **forgery_features}
-                    combined_features['label'] = label
-                    
-                    self.features_list.append(combined_features)
-                    
-                except Exception:
-                    pass
-
-        df = pd.DataFrame(self.features_list)
+    def collect_features(self, workers=None, checkpoint_every=500, resume=True, retry_failed=False):
+        """
+        Extracts forensic features for every image on a process pool.
+        Results are checkpointed every `checkpoint_every` images, so an
+        interrupted run picks up where it stopped when resumed.
+        """
+        from tqdm import tqdm
+        
+        print(f"Starting parallel feature extraction from: {self.data_dir}")
+        jobs = self.list_images()
+        
+        if resume:
+            # A checkpoint written with another feature set can't be mixed with new rows
+            for path, columns in ((CHECKPOINT_CSV, CHECKPOINT_COLUMNS), (FAILURES_CSV, FAILURE_COLUMNS)):
+                if os.path.exists(path) and os.path.getsize(path) and _read_header(path) != columns:
+                    print(f"Warning: '{path}' has different columns than this pipeline writes. Starting over.")
+                    resume = False
+        if not resume:
+            for path in (CHECKPOINT_CSV, FAILURES_CSV):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        # Skip images already handled by a previous (interrupted) run
+        done = set()
+        if os.path.exists(CHECKPOINT_CSV):
+            done.update(pd.read_csv(CHECKPOINT_CSV, usecols=['path'])['path'])
+        if os.path.exists(FAILURES_CSV):
+            failed = pd.read_csv(FAILURES_CSV)
+            if retry_failed:
+                os.remove(FAILURES_CSV)
+            else:
+                done.update(failed['path'])
+        pending = [job for job in jobs if job[0] not in done]
+        if done:
+            print(f"Resuming: {len(jobs) - len(pending)} images already processed, {len(pending)} to go.")
+        
+        rows, failures = [], []
+
+        def checkpoint():
+            nonlocal rows, failures
+            if rows:
+                _append_rows(CHECKPOINT_CSV, rows, CHECKPOINT_COLUMNS)
+            if failures:
+                _append_rows(FAILURES_CSV, failures, FAILURE_COLUMNS)
+            rows, failures = [], []
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        try:
+            results = pool.map(_extract_one, pending, chunksize=8)
+            for i, (img_path, label, features, error) in enumerate(tqdm(results, total=len(pending), desc="Extracting"), 1):
+                if error:
+                    failures.append({'path': img_path, 'label': label, 'reason': error})
+                else:
+                    rows.append({**features, 'label': label, 'path': img_path})
+                if i % checkpoint_every == 0:
+                    checkpoint()
+        finally:
+            # Also runs on Ctrl+C: keep what finished, drop the queued work
+            checkpoint()
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        if os.path.exists(FAILURES_CSV):
+            failed = pd.read_csv(FAILURES_CSV)
+            print(f"Warning: {len(failed)} images failed:")
+            for reason, count in failed['reason'].value_counts().head(10).items():
+                print(f"  {count} x {reason}")
+
+        df = pd.read_csv(CHECKPOINT_CSV) if os.path.exists(CHECKPOINT_CSV) else pd.DataFrame()
         if not df.empty:
-            df.to_csv('forensic_features.csv', index=False)
-            print("Feature extraction complete. Data saved to 'forensic_features.csv'.")
+            df = df[FEATURE_COLUMNS]
+            df.to_csv(FEATURES_CSV, index=False)
+            # Extraction finished; the next run starts fresh (and retries earlier failures)
+            for path in (CHECKPOINT_CSV, FAILURES_CSV):
+                if os.path.exists(path):
+                    os.remove(path)
+            print(f"Feature extraction complete. Data saved to '{FEATURES_CSV}'.")
+        self.features_list = df.to_dict('records')
         return df
 
     def train_model(self, df):
@@ -81,7 +186,7 @@ class ForensicTrainer:
             return None
 
         # Prepare features (X) and labels (y)
-        X = df.drop(['label'], axis=1)
+        X = df[MODEL_FEATURES]
         y = df['label']
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -105,10 +210,23 @@ class ForensicTrainer:
         return model
 
 if __name__ == "__main__":
-    dataset_path = os.path.join(os.getcwd(), 'data')
+    parser = argparse.ArgumentParser(description='Forensic feature extraction and training')
+    parser.add_argument('--data-dir', type=str, default=os.path.join(os.getcwd(), 'data'), help='Dataset root')
+    parser.add_argument('--workers', type=int, default=None, help='Extraction processes (default: all cores)')
+    parser.add_argument('--checkpoint-every', type=int, default=500, help='Images between checkpoints')
+    parser.add_argument('--fresh', action='store_true', help='Ignore any previous checkpoint')
+    parser.add_argument('--retry-failed', action='store_true', help='Retry images that failed previously')
+    args = parser.parse_args()
+
+    dataset_path = args.data_dir
     trainer = ForensicTrainer(data_dir=dataset_path)
     
-    df = trainer.collect_features()
+    df = trainer.collect_features(
+        workers=args.workers,
+        checkpoint_every=args.checkpoint_every,
+        resume=not args.fresh,
+        retry_failed=args.retry_failed
+    )
     
     if not df.empty:
         trainer.train_model(df)
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from compiled_forest import CompiledForest, check_parity, sample_inputs
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(400, 9)) * [1, 10, 100, 1e3, 0.01, 1, 1, 5, 50]
+    y = ((X[:, 0] + X[:, 1] / 10 - X[:, 2] / 100 + rng.normal(scale=0.5, size=400)) > 0).astype(int)
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+
+
+def edge_inputs(model, rows=256, seed=1):
+    """Rows where every feature sits exactly on, or one float32 step either side of, a split threshold."""
+    rng = np.random.default_rng(seed)
+    thresholds = [[] for _ in range(model.n_features_in_)]
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for f, t in zip(tree.feature, tree.threshold):
+            if f >= 0:
+                thresholds[f].append(t)
+    X = np.empty((rows, model.n_features_in_))
+    for f, ts in enumerate(thresholds):
+        t = np.float32(rng.choice(ts, size=rows)) if ts else np.zeros(rows, dtype=np.float32)
+        step = rng.integers(-1, 2, size=rows)
+        X[:, f] = np.where(step < 0, np.nextafter(t, np.float32(-np.inf)),
+                           np.where(step > 0, np.nextafter(t, np.float32(np.inf)), t))
+    return X
+
+
+def test_parity_on_random_inputs(model):
+    compiled = CompiledForest.from_sklearn(model)
+    ok, max_diff = check_parity(model, compiled, sample_inputs(model, rows=1000))
+    assert ok, max_diff
+
+
+def test_parity_on_threshold_edges(model):
+    compiled = CompiledForest.from_sklearn(model)
+    ok, max_diff = check_parity(model, compiled, edge_inputs(model))
+    assert ok, max_diff
+
+
+def test_saved_forest_matches(model, tmp_path):
+    CompiledForest.from_sklearn(model).save(tmp_path / "forest")
+    loaded = CompiledForest.load(tmp_path / "forest")
+    ok, max_diff = check_parity(model, loaded, sample_inputs(model, seed=3))
+    assert ok, max_diff
+
+
+def test_check_parity_reports_mismatch(model):
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.value = compiled.value[:, ::-1].copy()
+    ok, max_diff = check_parity(model, compiled, sample_inputs(model))
+    assert not ok
+    assert max_diff > 0
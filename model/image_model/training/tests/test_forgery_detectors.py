@@ -0,0 +1,80 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from forgery_detectors import ForgeryDetectors
+
+
+def textured_image(seed, size=256):
+    rng = np.random.default_rng(seed)
+    return (rng.random((size, size, 3)) * 255).astype(np.uint8)
+
+
+def cloned_image(seed):
+    image = textured_image(seed)
+    image[150:214, 150:214] = image[10:74, 10:74]
+    return image
+
+
+def loop_copy_move(detectors, image):
+    """The original per-match loop, kept as the reference for the vectorized default path."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    kp, des = detectors.orb.detectAndCompute(gray, None)
+    if des is None or len(kp) < 10:
+        return 0.0
+    cloning_points = 0
+    for m in detectors.bf_crosscheck.match(des, des):
+        idx1, idx2 = m.queryIdx, m.trainIdx
+        if idx1 == idx2:
+            continue
+        p1, p2 = kp[idx1].pt, kp[idx2].pt
+        dist = np.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
+        if m.distance < 10 and dist > 20:
+            cloning_points += 1
+    return (cloning_points / len(kp)) * 100
+
+
+@pytest.mark.parametrize("image", [
+    textured_image(0),
+    cloned_image(1),
+    np.zeros((128, 128, 3), dtype=np.uint8),
+    np.tile(np.linspace(0, 255, 300, dtype=np.uint8)[None, :, None], (200, 1, 3)),
+])
+def test_default_copy_move_matches_loop(image):
+    detectors = ForgeryDetectors()
+    expected = loop_copy_move(detectors, image)
+    assert detectors.detect_copy_move_crosscheck(image) == expected
+    # The default skips the computation: the cross-check score is always 0
+    assert detectors.detect_copy_move(image) == expected == 0.0
+
+
+def test_crosscheck_self_match_only_returns_self_matches():
+    # Exact duplicate descriptors are the only way another descriptor could tie with itself
+    rng = np.random.default_rng(4)
+    des = rng.integers(0, 256, (500, 32)).astype(np.uint8)
+    des = np.vstack([des, des[rng.permutation(500)[:200]]])
+    matches = ForgeryDetectors().bf_crosscheck.match(des, des)
+    assert matches
+    assert all(m.queryIdx == m.trainIdx for m in matches)
+
+
+def test_knn_scores_cloned_patch():
+    detectors = ForgeryDetectors(copy_move="knn")
+    assert detectors.detect_copy_move(cloned_image(2)) > 0
+
+
+def test_knn_ignores_self_matches():
+    detectors = ForgeryDetectors(copy_move="knn")
+    _, pairs = detectors.find_clone_pairs(textured_image(3))
+    assert not np.any(pairs[:, 0] == pairs[:, 1])
+    assert detectors.detect_copy_move(textured_image(3)) == 0.0
+
+
+def test_unknown_detector_rejected():
+    with pytest.raises(ValueError):
+        ForgeryDetectors(copy_move="sift")
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from preprocessing import ImagePreprocessor
+
+
+@pytest.fixture(scope="module")
+def large_jpeg(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur((rng.random((1600, 2400, 3)) * 255).astype(np.uint8), (0, 0), 2)
+    path = tmp_path_factory.mktemp("images") / "large.jpg"
+    cv2.imwrite(str(path), image)
+    return path
+
+
+def test_default_decode_matches_full_imread(large_jpeg):
+    # forensic_model.pkl was trained on full-resolution decodes
+    preprocessor = ImagePreprocessor(reduced_decode=False)
+    decoded = preprocessor.decode_bytes(large_jpeg.read_bytes())
+    assert np.array_equal(decoded, cv2.imread(str(large_jpeg)))
+
+
+def test_training_and_serving_decode_agree(large_jpeg):
+    for reduced in (False, True):
+        preprocessor = ImagePreprocessor(reduced_decode=reduced)
+        served = preprocessor.resize_with_padding(preprocessor.decode_bytes(large_jpeg.read_bytes()))
+        trained = preprocessor.process(str(large_jpeg))["original_standardized"]
+        assert np.array_equal(served, trained)
+
+
+def test_reduced_decode_keeps_target_size(large_jpeg):
+    preprocessor = ImagePreprocessor(reduced_decode=True)
+    decoded = preprocessor.decode_bytes(large_jpeg.read_bytes())
+    assert decoded.shape[:2] == (400, 600)
+    assert max(decoded.shape[:2]) >= max(preprocessor.target_size)
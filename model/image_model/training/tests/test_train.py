@@ -0,0 +1,53 @@
+import csv
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import train
+from train import ForensicTrainer
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    for category in ('training_real', 'training_fake'):
+        folder = tmp_path / 'data' / category
+        folder.mkdir(parents=True)
+        for i in range(2):
+            image = cv2.GaussianBlur((rng.random((120, 160, 3)) * 255).astype(np.uint8), (0, 0), 1)
+            cv2.imwrite(str(folder / f'{i}.jpg'), image)
+    (tmp_path / 'data' / 'training_fake' / 'broken.jpg').write_bytes(b'not an image')
+    # The CSVs are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'data'
+
+
+def header(path):
+    with open(path, newline='') as f:
+        return next(csv.reader(f))
+
+
+def test_completed_run_writes_model_columns_and_clears_state(dataset):
+    df = ForensicTrainer(data_dir=str(dataset)).collect_features(workers=1)
+    assert len(df) == 4
+    assert header(train.FEATURES_CSV) == train.MODEL_FEATURES + ['label']
+    assert not os.path.exists(train.CHECKPOINT_CSV)
+    # The failure log would otherwise make the next run skip the broken image for good
+    assert not os.path.exists(train.FAILURES_CSV)
+
+
+def test_checkpoint_with_other_columns_starts_over(dataset):
+    stale = train.CHECKPOINT_CSV
+    first = str(next((dataset / 'training_real').iterdir()))
+    with open(stale, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['old_feature', 'label', 'path'])
+        writer.writerow([1.0, 0, first])
+    df = ForensicTrainer(data_dir=str(dataset)).collect_features(workers=1)
+    assert len(df) == 4
+    assert list(df.columns) == train.MODEL_FEATURES + ['label']